@@ -0,0 +1,22 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+# Debug and bulk import endpoints answer only to `Authorization: Bearer $ADMIN_TOKEN`
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency for endpoints that expose internals or bulk-load data
+
+    They stay closed until ADMIN_TOKEN is set, so turning a profiler on in
+    production never publishes query parameters by accident, and nobody
+    can COPY rows in without the token.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to enable")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
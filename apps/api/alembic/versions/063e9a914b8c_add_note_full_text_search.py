@@ -0,0 +1,90 @@
+"""Add note full-text search
+
+Revision ID: 063e9a914b8c
+Revises: b92e066b46e3
+Create Date: 2026-10-16 22:45:12.118304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "063e9a914b8c"
+down_revision: Union[str, Sequence[str], None] = "b92e066b46e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Titles weigh more than content when ranking
+POSTGRES_UPGRADE = [
+    """
+    ALTER TABLE note ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_note_search_vector ON note USING gin (search_vector)",
+]
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX ix_note_search_vector",
+    "ALTER TABLE note DROP COLUMN search_vector",
+]
+
+# SQLite fallback: an external-content FTS5 table kept in sync by triggers
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE note_fts USING fts5(
+        title, content, content='note', content_rowid='id', tokenize='porter'
+    )
+    """,
+    """
+    CREATE TRIGGER note_fts_insert AFTER INSERT ON note BEGIN
+        INSERT INTO note_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER note_fts_delete AFTER DELETE ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER note_fts_update AFTER UPDATE OF title, content ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO note_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO note_fts(note_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER note_fts_update",
+    "DROP TRIGGER note_fts_delete",
+    "DROP TRIGGER note_fts_insert",
+    "DROP TABLE note_fts",
+]
+
+
+def _statements(postgres: Sequence[str], sqlite: Sequence[str]) -> Sequence[str]:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgres
+    if dialect == "sqlite":
+        return sqlite
+    return []
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in _statements(POSTGRES_UPGRADE, SQLITE_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in _statements(POSTGRES_DOWNGRADE, SQLITE_DOWNGRADE):
+        op.execute(statement)
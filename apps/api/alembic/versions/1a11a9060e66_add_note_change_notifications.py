@@ -0,0 +1,71 @@
+"""Add note change notifications
+
+Revision ID: 1a11a9060e66
+Revises: 9f96054c19d7
+Create Date: 2026-10-16 23:41:08.502917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1a11a9060e66"
+down_revision: Union[str, Sequence[str], None] = "9f96054c19d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Payloads stay tiny (table, action, id); listeners load the row themselves,
+# which also keeps them under NOTIFY's 8000-byte limit
+POSTGRES_UPGRADE = [
+    """
+    CREATE FUNCTION notify_row_change() RETURNS trigger AS $$
+    DECLARE
+        row_id integer;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            row_id := OLD.id;
+        ELSE
+            row_id := NEW.id;
+        END IF;
+        PERFORM pg_notify('row_changes', json_build_object(
+            'model', TG_TABLE_NAME,
+            'action', CASE TG_OP
+                WHEN 'INSERT' THEN 'created'
+                WHEN 'UPDATE' THEN 'updated'
+                ELSE 'deleted'
+            END,
+            'id', row_id
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER note_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON note
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change()
+    """,
+]
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER note_notify_change ON note",
+    "DROP FUNCTION notify_row_change()",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite has no NOTIFY; there the API publishes its own writes in-process
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_UPGRADE:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_DOWNGRADE:
+        op.execute(statement)
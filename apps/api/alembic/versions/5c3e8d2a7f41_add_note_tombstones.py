@@ -0,0 +1,103 @@
+"""Add note tombstones
+
+Revision ID: 5c3e8d2a7f41
+Revises: 1a11a9060e66
+Create Date: 2026-10-17 09:12:36.804151
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c3e8d2a7f41"
+down_revision: Union[str, Sequence[str], None] = "1a11a9060e66"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Deletes are now UPDATEs that set deleted_at; keep announcing them as
+# 'deleted'. to_jsonb keeps the function usable on any table.
+NOTIFY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+    DECLARE
+        row_id integer;
+        change text;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            row_id := OLD.id;
+            change := 'deleted';
+        ELSE
+            row_id := NEW.id;
+            change := CASE
+                WHEN TG_OP = 'INSERT' THEN 'created'
+                WHEN to_jsonb(NEW) ->> 'deleted_at' IS NOT NULL
+                    AND to_jsonb(OLD) ->> 'deleted_at' IS NULL THEN 'deleted'
+                ELSE 'updated'
+            END;
+        END IF;
+        PERFORM pg_notify('row_changes', json_build_object(
+            'model', TG_TABLE_NAME,
+            'action', change,
+            'id', row_id
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+PREVIOUS_NOTIFY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+    DECLARE
+        row_id integer;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            row_id := OLD.id;
+        ELSE
+            row_id := NEW.id;
+        END IF;
+        PERFORM pg_notify('row_changes', json_build_object(
+            'model', TG_TABLE_NAME,
+            'action', CASE TG_OP
+                WHEN 'INSERT' THEN 'created'
+                WHEN 'UPDATE' THEN 'updated'
+                ELSE 'deleted'
+            END,
+            'id', row_id
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+TOMBSTONES_EXIST = sa.text(
+    "SELECT EXISTS (SELECT 1 FROM note WHERE deleted_at IS NOT NULL)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default: no table rewrite. Syncs scan the existing
+    # ix_note_updated_at_id index, so no new index is needed.
+    op.add_column("note", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(NOTIFY_FUNCTION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Without the column tombstones would come back to life, and deleting
+    # rows is not a migration's call to make
+    if op.get_bind().execute(TOMBSTONES_EXIST).scalar():
+        raise RuntimeError(
+            "note has tombstones, which would come back as live notes. Purge "
+            "them first (DELETE FROM note WHERE deleted_at IS NOT NULL), "
+            "then downgrade again."
+        )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(PREVIOUS_NOTIFY_FUNCTION)
+    if op.get_bind().dialect.name == "sqlite":
+        # Native DROP COLUMN (SQLite 3.35+); a batch rebuild would lose the
+        # FTS triggers
+        op.execute("ALTER TABLE note DROP COLUMN deleted_at")
+    else:
+        op.drop_column("note", "deleted_at")
@@ -0,0 +1,141 @@
+"""Limit live note indexes to live rows
+
+Revision ID: 7d4a2c9e1b58
+Revises: e3b71f4c9a20
+Create Date: 2026-10-17 16:20:07.513840
+
+"""
+
+from typing import Optional, Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d4a2c9e1b58"
+down_revision: Union[str, Sequence[str], None] = "e3b71f4c9a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = "deleted_at IS NULL"
+# Indexes only reads of live rows use; tombstones would just bloat them.
+# ix_note_updated_at_id keeps every row: syncs and purges scan tombstones.
+# (name, Postgres definition, SQLite definition, predicate before this)
+LIVE_INDEXES = [
+    (
+        "ix_note_is_published_created_at_id",
+        "(is_published, created_at, id)",
+        "(is_published, created_at, id)",
+        None,
+    ),
+    (
+        "ix_note_is_published_updated_at_id",
+        "(is_published, updated_at, id)",
+        "(is_published, updated_at, id)",
+        None,
+    ),
+    (
+        "ix_note_published_created_at",
+        "(created_at, id)",
+        "(created_at, id)",
+        "is_published",
+    ),
+    ("ix_note_title_prefix", "(title varchar_pattern_ops)", "(title)", None),
+    ("ix_note_search_vector", "USING gin (search_vector)", None, None),
+]
+
+# Purging a tombstone is not a change: the row was announced as deleted
+# when it was tombstoned
+NOTIFY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION notify_row_changes() RETURNS trigger AS $$
+    DECLARE
+        change_actions text[];
+        change_ids integer[];
+        batch record;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg('created'::text), array_agg(id)
+            INTO change_actions, change_ids
+            FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg('deleted'::text), array_agg(o.id)
+            INTO change_actions, change_ids
+            FROM old_rows o
+            WHERE to_jsonb(o) ->> 'deleted_at' IS NULL;
+        ELSE
+            -- A soft delete is an UPDATE that sets deleted_at
+            SELECT array_agg(CASE
+                    WHEN to_jsonb(n) ->> 'deleted_at' IS NOT NULL
+                        AND to_jsonb(o) ->> 'deleted_at' IS NULL THEN 'deleted'
+                    ELSE 'updated'
+                END), array_agg(n.id)
+            INTO change_actions, change_ids
+            FROM new_rows n JOIN old_rows o ON o.id = n.id;
+        END IF;
+
+        FOR batch IN
+            SELECT action, json_agg(id ORDER BY id) AS ids
+            FROM (
+                SELECT action, id,
+                    (row_number() OVER (PARTITION BY action ORDER BY id) - 1) / 500
+                        AS chunk
+                FROM unnest(change_actions, change_ids) AS change(action, id)
+            ) numbered
+            GROUP BY action, chunk
+            ORDER BY action, chunk
+        LOOP
+            PERFORM pg_notify('row_changes', json_build_object(
+                'model', TG_TABLE_NAME,
+                'action', batch.action,
+                'ids', batch.ids
+            )::text);
+        END LOOP;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+PREVIOUS_NOTIFY_FUNCTION = NOTIFY_FUNCTION.replace(
+    """            FROM old_rows o
+            WHERE to_jsonb(o) ->> 'deleted_at' IS NULL;""",
+    "            FROM old_rows o;",
+)
+
+
+def _where(*predicates: Optional[str]) -> str:
+    predicates = [predicate for predicate in predicates if predicate]
+    return f" WHERE {' AND '.join(predicates)}" if predicates else ""
+
+
+def _rebuild_indexes(live: bool) -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Build the replacement first so reads never lose their index;
+        # CONCURRENTLY cannot run inside the migration transaction
+        with op.get_context().autocommit_block():
+            for name, definition, _, previous in LIVE_INDEXES:
+                where = _where(previous, LIVE if live else None)
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY {name}_swap ON note {definition}{where}"
+                )
+                op.execute(f"DROP INDEX CONCURRENTLY {name}")
+                op.execute(f"ALTER INDEX {name}_swap RENAME TO {name}")
+    elif dialect == "sqlite":
+        for name, _, definition, previous in LIVE_INDEXES:
+            if definition is None:
+                continue
+            where = _where(previous, LIVE if live else None)
+            op.execute(f"DROP INDEX {name}")
+            op.execute(f"CREATE INDEX {name} ON note {definition}{where}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(NOTIFY_FUNCTION)
+    _rebuild_indexes(live=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(PREVIOUS_NOTIFY_FUNCTION)
+    _rebuild_indexes(live=False)
@@ -0,0 +1,41 @@
+"""Add note timestamp server defaults
+
+Revision ID: 9f96054c19d7
+Revises: 9b7d09c2f53c
+Create Date: 2026-10-16 23:05:41.273019
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9f96054c19d7"
+down_revision: Union[str, Sequence[str], None] = "9b7d09c2f53c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # COPY leaves the timestamps out and lets Postgres fill them. SQLite
+    # cannot alter a default without rebuilding the table (and its FTS
+    # triggers); its import path inserts Python-side defaults instead.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            "note", column, server_default=sa.text("timezone('utc', now())")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in TIMESTAMP_COLUMNS:
+        op.alter_column("note", column, server_default=None)
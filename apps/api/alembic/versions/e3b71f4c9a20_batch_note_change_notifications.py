@@ -0,0 +1,142 @@
+"""Batch note change notifications per statement
+
+Revision ID: e3b71f4c9a20
+Revises: 5c3e8d2a7f41
+Create Date: 2026-10-17 14:03:51.227409
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b71f4c9a20"
+down_revision: Union[str, Sequence[str], None] = "5c3e8d2a7f41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# One NOTIFY per statement and action instead of one per row, so a COPY
+# import or bulk write no longer floods the queue. Ids go out in chunks of
+# 500, which keeps each payload well under NOTIFY's 8000-byte limit.
+POSTGRES_UPGRADE = [
+    "DROP TRIGGER note_notify_change ON note",
+    "DROP FUNCTION notify_row_change()",
+    """
+    CREATE FUNCTION notify_row_changes() RETURNS trigger AS $$
+    DECLARE
+        change_actions text[];
+        change_ids integer[];
+        batch record;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg('created'::text), array_agg(id)
+            INTO change_actions, change_ids
+            FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg('deleted'::text), array_agg(id)
+            INTO change_actions, change_ids
+            FROM old_rows;
+        ELSE
+            -- A soft delete is an UPDATE that sets deleted_at
+            SELECT array_agg(CASE
+                    WHEN to_jsonb(n) ->> 'deleted_at' IS NOT NULL
+                        AND to_jsonb(o) ->> 'deleted_at' IS NULL THEN 'deleted'
+                    ELSE 'updated'
+                END), array_agg(n.id)
+            INTO change_actions, change_ids
+            FROM new_rows n JOIN old_rows o ON o.id = n.id;
+        END IF;
+
+        FOR batch IN
+            SELECT action, json_agg(id ORDER BY id) AS ids
+            FROM (
+                SELECT action, id,
+                    (row_number() OVER (PARTITION BY action ORDER BY id) - 1) / 500
+                        AS chunk
+                FROM unnest(change_actions, change_ids) AS change(action, id)
+            ) numbered
+            GROUP BY action, chunk
+            ORDER BY action, chunk
+        LOOP
+            PERFORM pg_notify('row_changes', json_build_object(
+                'model', TG_TABLE_NAME,
+                'action', batch.action,
+                'ids', batch.ids
+            )::text);
+        END LOOP;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    # Transition tables need one trigger per event
+    """
+    CREATE TRIGGER note_notify_insert
+    AFTER INSERT ON note REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()
+    """,
+    """
+    CREATE TRIGGER note_notify_update
+    AFTER UPDATE ON note REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()
+    """,
+    """
+    CREATE TRIGGER note_notify_delete
+    AFTER DELETE ON note REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()
+    """,
+]
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER note_notify_insert ON note",
+    "DROP TRIGGER note_notify_update ON note",
+    "DROP TRIGGER note_notify_delete ON note",
+    "DROP FUNCTION notify_row_changes()",
+    """
+    CREATE FUNCTION notify_row_change() RETURNS trigger AS $$
+    DECLARE
+        row_id integer;
+        change text;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            row_id := OLD.id;
+            change := 'deleted';
+        ELSE
+            row_id := NEW.id;
+            change := CASE
+                WHEN TG_OP = 'INSERT' THEN 'created'
+                WHEN to_jsonb(NEW) ->> 'deleted_at' IS NOT NULL
+                    AND to_jsonb(OLD) ->> 'deleted_at' IS NULL THEN 'deleted'
+                ELSE 'updated'
+            END;
+        END IF;
+        PERFORM pg_notify('row_changes', json_build_object(
+            'model', TG_TABLE_NAME,
+            'action', change,
+            'id', row_id
+        )::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER note_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON note
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change()
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_UPGRADE:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_DOWNGRADE:
+        op.execute(statement)
@@ -0,0 +1,125 @@
+"""Measure cold start: fresh interpreter to first response
+
+Every run starts a new Python process that imports `apps.api.index` and
+serves one request in-process, the way a serverless cold start does (no
+lifespan), and reports where the time went:
+
+    python -m apps.api.benchmarks.cold_start --runs 10
+    python -m apps.api.benchmarks.cold_start --max-ms 600 --max-modules 500
+
+`--path /graphql` sends a `notes` query, so Strawberry, the schema and the
+database connection are part of the first response. With `--max-ms` the
+command fails when the median total exceeds the budget, and with
+`--max-modules` when the first response loaded more modules than that.
+The module count does not depend on the machine, so CI gates on both.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Runs in the child process; everything it imports counts
+CHILD = """
+import time
+started = time.perf_counter()
+import asyncio, json, sys
+import apps.api.index
+imported = time.perf_counter()
+
+async def first_response(path):
+    # A bare ASGI call, so no HTTP client library is timed with the app
+    body = b""
+    method = "GET"
+    if path == "/graphql":
+        method = "POST"
+        body = json.dumps({"query": "query { notes(first: 1) { id } }"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("cold", 80),
+        "headers": [(b"content-type", b"application/json")],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await apps.api.index.app(scope, receive, send)
+    if status != [200]:
+        raise SystemExit(f"{path} answered {status}")
+
+asyncio.run(first_response(sys.argv[1]))
+responded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (responded - imported) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(path: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    result["total_ms"] = result["import_ms"] + result["first_response_ms"]
+    return result
+
+
+def summarize(results: List[Dict[str, float]], key: str) -> str:
+    values = sorted(result[key] for result in results)
+    p95 = values[max(int(len(values) * 0.95) - 1, 0)]
+    return f"p50 {statistics.median(values):8.1f} ms  p95 {p95:8.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/health", help="/health or /graphql")
+    parser.add_argument(
+        "--max-ms", type=float, help="fail if the median total exceeds this"
+    )
+    parser.add_argument(
+        "--max-modules", type=int, help="fail if more modules than this load"
+    )
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+
+    print(f"cold start to first {args.path} response, {args.runs} runs")
+    for key in ("import_ms", "first_response_ms", "total_ms", "process_ms"):
+        print(f"{key:>18}: {summarize(results, key)}")
+    print(f"{'modules loaded':>18}: {int(results[-1]['modules'])}")
+
+    failed = False
+    median_total = statistics.median(result["total_ms"] for result in results)
+    if args.max_ms is not None and median_total > args.max_ms:
+        print(f"median total {median_total:.1f} ms exceeds {args.max_ms:.1f} ms")
+        failed = True
+    modules = int(results[-1]["modules"])
+    if args.max_modules is not None and modules > args.max_modules:
+        print(f"{modules} modules loaded, more than {args.max_modules}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
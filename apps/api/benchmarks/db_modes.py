@@ -0,0 +1,99 @@
+"""Compare GraphQL throughput of the sync and async database paths
+
+Runs the same operation through the ASGI app in-process, once per
+`DATABASE_MODE`, at the same client concurrency:
+
+    python -m apps.api.benchmarks.db_modes --concurrency 32 --requests 2000
+
+Point `POSTGRES_URL_NON_POOLING` at the database to measure. `--seed N`
+creates the tables and inserts N notes first, which makes a throwaway
+SQLite file usable as a stand-in.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from .. import database
+from ..index import app
+from ..models.note import Note
+
+QUERIES = {
+    "notes": "query { notes(first: 50) { id title content isPublished } }",
+    "note": "query { note(id: 1) { id title content isPublished } }",
+}
+
+
+def seed(count: int) -> None:
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.add_all(
+            Note(title=f"Note {i}", content="lorem ipsum " * 20) for i in range(count)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_mode(
+    mode: str, query: str, concurrency: int, requests: int
+) -> Dict[str, float]:
+    database.DATABASE_MODE = mode
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/graphql", json={"query": query})
+                latencies.append(time.perf_counter() - started)
+                body = response.json()
+                if body.get("errors"):
+                    raise RuntimeError(body["errors"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--query", choices=sorted(QUERIES), default="notes")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+
+    print(f"{args.query}: {args.requests} requests at concurrency {args.concurrency}")
+    for mode in ("sync", "async"):
+        result = asyncio.run(
+            run_mode(mode, QUERIES[args.query], args.concurrency, args.requests)
+        )
+        print(
+            f"{mode:>5}: {result['throughput']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
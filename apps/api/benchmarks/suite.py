@@ -0,0 +1,347 @@
+"""Latency, throughput and SQL-per-operation benchmarks for the GraphQL API
+
+Runs every operation in-process against the ASGI app on a seeded database
+and reports p50/p95/p99 latency, throughput and the SQL statements each
+request issued:
+
+    python -m apps.api.benchmarks.suite --rows 100000 --output results.json
+    python -m apps.api.benchmarks.suite --rows 1000 \\
+        --compare apps/api/benchmarks/baselines/sqlite-1000.json
+
+Point `POSTGRES_URL_NON_POOLING` at a local Postgres, or at a throwaway
+SQLite file as a stand-in. The notes table is created if needed and
+(re)seeded to exactly `--rows` deterministic notes, so runs on the same
+database and row count are comparable. `--compare` exits non-zero when an
+operation issues more statements than its baseline, or, with
+`--latency-tolerance`, when its p95 grows by more than that fraction.
+Latency baselines only compare on the machine that recorded them;
+statement counts compare anywhere.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import event, func, select
+
+from .. import database
+from ..index import app
+from ..models.note import Note
+from ..resolvers.note import NoteResolver
+
+SEED_COLUMNS = ["title", "content", "is_published"]
+SEED_CHUNK_SIZE = 10000
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+Variables = Callable[["BenchmarkState"], Dict[str, Any]]
+
+
+@dataclass
+class BenchmarkState:
+    rng: random.Random
+    max_id: int
+    # Ids created for the delete benchmarks, so deletes never shrink the seed
+    disposable: List[int] = field(default_factory=list)
+
+    def existing_id(self) -> int:
+        return self.rng.randint(1, self.max_id)
+
+    def existing_ids(self, count: int) -> List[int]:
+        return self.rng.sample(range(1, self.max_id + 1), count)
+
+    def take_disposable(self, count: int = 1) -> List[int]:
+        taken, self.disposable = self.disposable[:count], self.disposable[count:]
+        return taken
+
+
+@dataclass
+class Operation:
+    query: str
+    variables: Variables = lambda state: {}
+    # Rows each request deletes, provisioned before timing starts
+    disposes: int = 0
+
+
+def _title(state: BenchmarkState) -> str:
+    return " ".join(state.rng.choices(WORDS, k=4))
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "health": Operation("query { health { status database { status } } }"),
+    "notes": Operation(
+        "query { notes(first: 50) { id title content isPublished updatedAt } }"
+    ),
+    "note": Operation(
+        "query ($id: Int!) { note(id: $id) { id title content isPublished } }",
+        lambda state: {"id": state.existing_id()},
+    ),
+    "createNote": Operation(
+        "mutation ($input: CreateNoteInput!) { createNote(input: $input) { id } }",
+        lambda state: {"input": {"title": _title(state), "content": "benchmark"}},
+    ),
+    "updateNote": Operation(
+        "mutation ($id: Int!, $input: UpdateNoteInput!) "
+        "{ updateNote(id: $id, input: $input) { id } }",
+        lambda state: {"id": state.existing_id(), "input": {"title": _title(state)}},
+    ),
+    "deleteNote": Operation(
+        "mutation ($id: Int!) { deleteNote(id: $id) }",
+        lambda state: {"id": state.take_disposable()[0]},
+        disposes=1,
+    ),
+    "createNotes": Operation(
+        "mutation ($inputs: [CreateNoteInput!]!) { createNotes(inputs: $inputs) { id } }",
+        lambda state: {
+            "inputs": [{"title": _title(state), "content": "benchmark"}] * 10
+        },
+    ),
+    "updateNotes": Operation(
+        "mutation ($inputs: [BulkUpdateNoteInput!]!) "
+        "{ updateNotes(inputs: $inputs) { id } }",
+        lambda state: {
+            "inputs": [
+                {"id": id, "input": {"isPublished": True}}
+                for id in state.existing_ids(10)
+            ]
+        },
+    ),
+    "deleteNotes": Operation(
+        "mutation ($ids: [Int!]!) { deleteNotes(ids: $ids) }",
+        lambda state: {"ids": state.take_disposable(10)},
+        disposes=10,
+    ),
+}
+
+
+class StatementCounter:
+    """Counts SQL statements sent through the sync and async engines"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        for engine in (database.get_engine(), database.get_async_engine().sync_engine):
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+
+def _seed_rows(rng: random.Random, count: int) -> List[tuple]:
+    return [
+        (" ".join(rng.choices(WORDS, k=4)), " ".join(rng.choices(WORDS, k=40)), False)
+        for _ in range(count)
+    ]
+
+
+def seed(rows: int) -> int:
+    """Make the notes table hold exactly `rows` deterministic notes
+
+    Returns the highest id; reseeding only happens when the count differs.
+    """
+    database.Base.metadata.create_all(database.get_engine())
+    db = database.SessionLocal()
+    try:
+        if db.scalar(select(func.count()).select_from(Note)) != rows:
+            db.query(Note).delete()
+            db.commit()
+            rng = random.Random(0)
+            for start in range(0, rows, SEED_CHUNK_SIZE):
+                chunk = _seed_rows(rng, min(SEED_CHUNK_SIZE, rows - start))
+                NoteResolver.bulk_copy(db, SEED_COLUMNS, chunk)
+        return db.scalar(select(func.max(Note.id))) or 0
+    finally:
+        db.close()
+
+
+def provision(state: BenchmarkState, count: int) -> None:
+    """Insert `count` throwaway notes for the delete benchmarks to remove"""
+    if count <= 0:
+        return
+    db = database.SessionLocal()
+    try:
+        start = db.scalar(select(func.max(Note.id))) or 0
+        NoteResolver.bulk_copy(db, SEED_COLUMNS, _seed_rows(state.rng, count))
+        state.disposable = list(
+            db.scalars(select(Note.id).where(Note.id > start).order_by(Note.id))
+        )
+    finally:
+        db.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    index = max(int(round(len(values) * fraction)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+async def run_operation(
+    client: httpx.AsyncClient,
+    operation: Operation,
+    state: BenchmarkState,
+    counter: StatementCounter,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    payloads = [
+        {"query": operation.query, "variables": operation.variables(state)}
+        for _ in range(requests)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(payload: Dict[str, Any]) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/graphql", json=payload)
+            latencies.append(time.perf_counter() - started)
+            body = response.json()
+            if body.get("errors"):
+                raise RuntimeError(body["errors"])
+
+    statements = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    elapsed = time.perf_counter() - started
+    statements = counter.count - statements
+
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": requests,
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "statements_per_op": round(statements / requests, 2),
+    }
+
+
+async def run_suite(
+    names: List[str], rows: int, requests: int, concurrency: int, warmup: int
+) -> Dict[str, Any]:
+    max_id = seed(rows)
+    state = BenchmarkState(rng=random.Random(1), max_id=max_id)
+    provision(
+        state,
+        sum(OPERATIONS[name].disposes * (requests + warmup) for name in names),
+    )
+    counter = StatementCounter()
+
+    results: Dict[str, Dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for name in names:
+            operation = OPERATIONS[name]
+            if warmup:
+                await run_operation(client, operation, state, counter, warmup, 1)
+            results[name] = await run_operation(
+                client, operation, state, counter, requests, concurrency
+            )
+
+    return {
+        "meta": {
+            "dialect": database.get_engine().dialect.name,
+            "mode": database.DATABASE_MODE,
+            "rows": rows,
+            "requests": requests,
+            "concurrency": concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "operations": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    latency_tolerance: Optional[float],
+) -> List[str]:
+    """Regressions of `results` against `baseline`, one message each"""
+    regressions = []
+    for name, current in results["operations"].items():
+        expected = baseline["operations"].get(name)
+        if expected is None:
+            continue
+        if current["statements_per_op"] > expected["statements_per_op"]:
+            regressions.append(
+                f"{name}: {current['statements_per_op']} statements per request, "
+                f"baseline {expected['statements_per_op']}"
+            )
+        if latency_tolerance is not None:
+            limit = expected["p95_ms"] * (1 + latency_tolerance)
+            if current["p95_ms"] > limit:
+                regressions.append(
+                    f"{name}: p95 {current['p95_ms']:.2f} ms, "
+                    f"baseline {expected['p95_ms']:.2f} ms (+{latency_tolerance:.0%})"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="e.g. 1000, 100000")
+    parser.add_argument(
+        "--operations",
+        default=",".join(OPERATIONS),
+        help=f"comma-separated subset of {', '.join(OPERATIONS)}",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--latency-tolerance", type=float)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.operations.split(",") if name.strip()]
+    unknown = [name for name in names if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(unknown)}")
+
+    results = asyncio.run(
+        run_suite(names, args.rows, args.requests, args.concurrency, args.warmup)
+    )
+
+    meta = results["meta"]
+    print(
+        f"{meta['dialect']} ({meta['mode']}), {meta['rows']} notes, "
+        f"{meta['requests']} requests at concurrency {meta['concurrency']}"
+    )
+    print(
+        f"{'operation':>12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'SQL/op':>7}"
+    )
+    for name, result in results["operations"].items():
+        print(
+            f"{name:>12} {result['throughput']:9.1f} {result['p50_ms']:9.2f} "
+            f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} "
+            f"{result['statements_per_op']:7.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.latency_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
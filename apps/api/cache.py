@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class GenerationBackend:
+    """Stores the generation counters that invalidate cache entries
+
+    Every cache key embeds the current generation of the list or id it
+    belongs to; bumping a counter makes those keys unreachable. Pointing
+    several workers at one shared backend (e.g. a Redis `INCR`/`GET`
+    implementation of these two methods) shares invalidation between them.
+    """
+
+    def get(self, key: str) -> int:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class InMemoryGenerationBackend(GenerationBackend):
+    """Process-local counters, also used as the shared backend in tests"""
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+def _approximate_size(value: Any, seen: Optional[set] = None) -> int:
+    """Rough deep `sys.getsizeof` of a cached result"""
+    seen = seen if seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(
+            _approximate_size(k, seen) + _approximate_size(v, seen)
+            for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_approximate_size(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + _approximate_size(vars(value), seen)
+    return size
+
+
+def freeze(value: Any) -> Hashable:
+    """Turn resolver arguments into a hashable cache key component"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(item) for item in value))
+    return value
+
+
+class QueryCache:
+    """LRU result cache with a TTL and a byte budget
+
+    Entries are keyed by model, operation and arguments. List results also
+    carry the model's list generation and per-id results the id's
+    generation, so `invalidate` drops exactly what a write can affect.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        backend: Optional[GenerationBackend] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend or InMemoryGenerationBackend()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["QueryCache"]:
+        """Build the cache from `QUERY_CACHE_*`; a zero byte budget disables it"""
+        max_bytes = int(os.getenv("QUERY_CACHE_MAX_BYTES", "0"))
+        if max_bytes <= 0:
+            return None
+        return cls(max_bytes=max_bytes, ttl=float(os.getenv("QUERY_CACHE_TTL", "30")))
+
+    def list_key(self, model: str, operation: str, args: Hashable) -> Hashable:
+        return (model, operation, args, self.backend.get(f"{model}:list"))
+
+    def id_key(self, model: str, operation: str, id: int, args: Hashable) -> Hashable:
+        return (model, operation, id, args, self.backend.get(f"{model}:{id}"))
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            value, size, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = _approximate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, model: str, ids: Iterable[int] = ()) -> None:
+        """Forget `model`'s list results and every result for `ids`"""
+        for id in ids:
+            self.backend.incr(f"{model}:{id}")
+        self.backend.incr(f"{model}:list")
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+query_cache: Optional[QueryCache] = QueryCache.from_env()
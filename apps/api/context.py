@@ -0,0 +1,32 @@
+from typing import Dict
+
+from strawberry.dataloader import DataLoader
+from strawberry.fastapi import BaseContext
+
+from .unit_of_work import UnitOfWork
+
+
+class Context(BaseContext):
+    """Per-request GraphQL context
+
+    Holds one DataLoader per schema generator so every `note(id)`-style
+    lookup made while resolving an operation is batched into a single query,
+    and the unit of work whose session those queries share.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.loaders: Dict[type, DataLoader] = {}
+        # Opens no session until a resolver needs one
+        self.unit_of_work = UnitOfWork()
+
+    def by_id_loader(self, generator: type) -> DataLoader:
+        loader = self.loaders.get(generator)
+        if loader is None:
+            loader = DataLoader(load_fn=generator.load_by_ids)
+            self.loaders[generator] = loader
+        return loader
+
+
+async def get_context() -> Context:
+    return Context()
@@ -1,27 +1,404 @@
+import asyncio
 import os
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool, Pool
 
-# Load environment variables from the root directory
-env_path = os.path.join(
-    os.path.dirname(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    ),  # noqa: E501
+from .instrumentation import instrument_engine, timed_pool_class
+from .query_profiler import query_profiler
+from .replicas import parse_lsn, record_write, replica_router, replica_urls
+
+# Local settings in the repository root; deployments set the environment
+# directly. `pnpm dev` passes it to uvicorn, so settings below see it too.
+ENV_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
     ".env.local",
 )
-load_dotenv(env_path)
 
-DATABASE_URL = os.getenv("POSTGRES_URL_NON_POOLING")
-if not DATABASE_URL:
-    raise ValueError("POSTGRES_URL_NON_POOLING environment variable is required")
+# "sync" runs resolvers on psycopg2 sessions, "async" on asyncpg AsyncSessions
+DATABASE_MODE = os.getenv("DATABASE_MODE", "sync").lower()
+DATABASE_WARMUP = os.getenv("DATABASE_WARMUP", "").lower() in ("1", "true", "yes")
+# "queue" keeps a connection pool in each process, for long-lived workers;
+# "null" opens a connection per checkout and leaves pooling to Supabase's
+# pooler, for serverless; "auto" picks "null" on Vercel and AWS Lambda
+DATABASE_POOL = os.getenv("DATABASE_POOL", "auto").lower()
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+# Seconds before a pooled connection is replaced; -1 keeps them forever
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Read ENV_FILE into the environment once, without overriding it
+
+    Called before the database URLs are read, so scripts that import the
+    app find their connection. Where the file does not exist, as on
+    Vercel, python-dotenv is never imported.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    if os.path.exists(ENV_FILE):
+        from dotenv import load_dotenv
+
+        load_dotenv(ENV_FILE)
+
+
+def is_async_mode() -> bool:
+    return DATABASE_MODE == "async"
+
+
+def pool_strategy() -> str:
+    if DATABASE_POOL in ("queue", "null"):
+        return DATABASE_POOL
+    serverless = os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+    return "null" if serverless else "queue"
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg spells libpq's `sslmode` as `ssl`
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+class LazySessionmaker:
+    """A session factory whose engine is only created with the first session
+
+    Calling it is the same as calling the `sessionmaker` it wraps, so
+    `SessionLocal()` and `async with AsyncSessionLocal()` read as usual.
+    """
+
+    def __init__(
+        self,
+        get_bind: Callable[[], Any],
+        factory: Callable[..., Any],
+        **options: Any,
+    ) -> None:
+        self._get_bind = get_bind
+        self._factory = factory
+        self._options = options
+        self._maker: Optional[Any] = None
+
+    def __call__(self, **local_kw: Any) -> Any:
+        if self._maker is None:
+            self._maker = self._factory(bind=self._get_bind(), **self._options)
+        return self._maker(**local_kw)
+
+
+_engine_lock = threading.Lock()
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_replica_engines: Optional[List[Engine]] = None
+_async_replica_engines: Optional[List[AsyncEngine]] = None
+
+
+def _normalize_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    parsed = make_url(url)
+    if "supa" in parsed.query:
+        # Supabase tags pooler URLs with `supa=...`, which libpq rejects
+        parsed = parsed.difference_update_query(["supa"])
+        url = parsed.render_as_string(hide_password=False)
+    return url
+
+
+def get_database_url() -> str:
+    """The direct connection, also used by Alembic and LISTEN"""
+    load_env()
+    url = os.getenv("POSTGRES_URL_NON_POOLING")
+    if not url:
+        raise ValueError("POSTGRES_URL_NON_POOLING environment variable is required")
+    return _normalize_url(url)
+
+
+def uses_external_pooler() -> bool:
+    """Whether the resolvers connect through Supabase's pooler (POSTGRES_URL)"""
+    return pool_strategy() == "null" and bool(os.getenv("POSTGRES_URL"))
+
+
+def get_engine_url() -> str:
+    """The URL the primary engines connect to
+
+    With the "null" strategy that is the pooled POSTGRES_URL where it is
+    set, so many short-lived instances share the pooler's connections
+    instead of each opening their own to Postgres.
+    """
+    load_env()
+    if uses_external_pooler():
+        return _normalize_url(os.environ["POSTGRES_URL"])
+    return get_database_url()
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def _engine_options(url: str, pooled: bool = False) -> Dict[str, Any]:
+    """Pool settings for an engine on `url`
+
+    `pooled` marks a URL behind PgBouncer in transaction mode, where each
+    transaction may run on a different server connection: asyncpg must
+    not cache prepared statements or reuse their names there.
+    """
+    parsed = make_url(url)
+    if pool_strategy() == "null":
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        if pooled and parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _unique_statement_name,
+            }
+        return options
+
+    # Swap in the pool subclass that reports checkout waits per request
+    poolclass = timed_pool_class(url)
+    if poolclass is None:
+        # e.g. in-memory SQLite, whose pool takes none of the settings below
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+    }
+
+
+def _instrument(engine: Engine) -> None:
+    instrument_engine(engine)
+    if query_profiler is not None:
+        query_profiler.attach(engine)
+
+
+def get_engine() -> Engine:
+    """The sync psycopg2 engine, created (and its driver imported) on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = get_engine_url()
+                _engine = create_engine(
+                    url, **_engine_options(url, pooled=uses_external_pooler())
+                )
+                _instrument(_engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                url = to_async_url(get_engine_url())
+                _async_engine = create_async_engine(
+                    url, **_engine_options(url, pooled=uses_external_pooler())
+                )
+                _instrument(_async_engine.sync_engine)
+    return _async_engine
+
+
+def _watch_replica(engine: Engine, index: int) -> None:
+    def on_error(context: Any) -> None:
+        # A dead or unreachable replica sits out until it probes healthy again
+        if context.is_disconnect or context.connection is None:
+            replica_router.mark_failed(index)
+
+    event.listen(engine, "handle_error", on_error)
+
+
+def get_replica_engines() -> List[Engine]:
+    """Sync engines for DATABASE_REPLICA_URLS, in order, created on first use"""
+    global _replica_engines
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                engines = []
+                for index, url in enumerate(replica_urls()):
+                    engine = create_engine(url, **_engine_options(url))
+                    _instrument(engine)
+                    _watch_replica(engine, index)
+                    engines.append(engine)
+                _replica_engines = engines
+    return _replica_engines
+
+
+def get_async_replica_engines() -> List[AsyncEngine]:
+    global _async_replica_engines
+    if _async_replica_engines is None:
+        with _engine_lock:
+            if _async_replica_engines is None:
+                engines = []
+                for index, url in enumerate(replica_urls()):
+                    url = to_async_url(url)
+                    engine = create_async_engine(url, **_engine_options(url))
+                    _instrument(engine.sync_engine)
+                    _watch_replica(engine.sync_engine, index)
+                    engines.append(engine)
+                _async_replica_engines = engines
+    return _async_replica_engines
+
+
+def resolver_pool() -> Optional[Pool]:
+    """The pool of the engine the resolvers use, or None before it exists"""
+    if is_async_mode():
+        return _async_engine.sync_engine.pool if _async_engine is not None else None
+    return _engine.pool if _engine is not None else None
+
+
+def __getattr__(name: str) -> Any:
+    # `database.engine` and friends keep working, but only build on access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "DATABASE_URL":
+        return get_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Set while a read that a replica may serve is running
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Let sessions send this block's queries to a replica
+
+    Only takes effect with DATABASE_REPLICA_URLS set, and the router may
+    still pick the primary.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class RoutingSession(Session):
+    """Session that sends reads inside `replica_reads()` to a replica"""
+
+    @staticmethod
+    def replica_engines() -> List[Engine]:
+        return get_replica_engines()
+
+    def get_bind(self, mapper: Any = None, **kw: Any) -> Any:
+        if replica_router is not None and _replica_reads.get() and not self._flushing:
+            # Chosen once per session; the ORM asks more than once per query
+            if "replica" not in self.info:
+                self.info["replica"] = replica_router.choose()
+            index = self.info["replica"]
+            if index is not None:
+                return self.replica_engines()[index]
+        return super().get_bind(mapper, **kw)
+
+
+class AsyncRoutingSession(RoutingSession):
+    @staticmethod
+    def replica_engines() -> List[Engine]:
+        return [engine.sync_engine for engine in get_async_replica_engines()]
+
+
+# The sync engine stays the one Alembic and scripts use
+SessionLocal = LazySessionmaker(
+    get_engine,
+    sessionmaker,
+    autocommit=False,
+    autoflush=False,
+    class_=RoutingSession,
+)
+AsyncSessionLocal = LazySessionmaker(
+    get_async_engine,
+    async_sessionmaker,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=AsyncRoutingSession,
+)
+
+PRIMARY_LSN_QUERY = text("SELECT pg_current_wal_lsn()::text")
 
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async def record_primary_write() -> None:
+    """Give the current request a read-after token for the write it just made
+
+    On Postgres the token carries the primary's WAL position so replicas
+    that have replayed it can serve the client again right away.
+    """
+    if replica_router is None:
+        return
+
+    def position(connection: Any) -> Optional[int]:
+        if connection.dialect.name != "postgresql":
+            return None
+        return parse_lsn(connection.execute(PRIMARY_LSN_QUERY).scalar())
+
+    def read_position() -> Optional[int]:
+        with get_engine().connect() as connection:
+            return position(connection)
+
+    lsn = None
+    try:
+        if is_async_mode():
+            async with get_async_engine().connect() as connection:
+                lsn = await connection.run_sync(position)
+        else:
+            # A pool checkout and a round trip; keep them off the event loop
+            lsn = await asyncio.to_thread(read_position)
+    except Exception:
+        # Without a position the client is pinned for REPLICA_STICKY_SECONDS
+        pass
+    record_write(lsn)
+
+
+async def warm_up() -> None:
+    """Create the engine the resolvers use and open its first connection
+
+    Off by default; `DATABASE_WARMUP=1` runs it in the background at
+    startup so the first request finds a connected pool.
+    """
+
+    def connect() -> None:
+        with get_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    try:
+        if is_async_mode():
+            async with get_async_engine().connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        else:
+            await asyncio.to_thread(connect)
+    except Exception:
+        # Only an optimization; the health probe reports connection problems
+        pass
+
 
 Base = declarative_base()
 
@@ -32,3 +409,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from .database import AsyncSessionLocal, get_db, is_async_mode
+from .resolvers.base import BaseResolver
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunk(columns: Sequence[str], batch: Sequence[Row]) -> str:
+    """One JSON object per line for every row of `batch`"""
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+        for row in batch
+    )
+
+
+def csv_chunk(columns: Sequence[str], batch: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in batch
+    )
+    return buffer.getvalue()
+
+
+def csv_header(columns: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+Header = Callable[[Sequence[str]], str]
+Encoder = Callable[[Sequence[str], Sequence[Row]], str]
+
+# format -> (media type, header writer, batch encoder)
+EXPORT_FORMATS: Dict[str, Tuple[str, Optional[Header], Encoder]] = {
+    "ndjson": ("application/x-ndjson", None, ndjson_chunk),
+    "csv": ("text/csv", csv_header, csv_chunk),
+}
+
+
+def _stream_sync(
+    resolver: Type[BaseResolver],
+    columns: Sequence[str],
+    header: Optional[Header],
+    encode: Encoder,
+) -> Iterator[str]:
+    if header is not None:
+        yield header(columns)
+    db: Session = next(get_db())
+    try:
+        for batch in resolver.stream(db, columns):
+            yield encode(columns, batch)
+    finally:
+        db.close()
+
+
+async def _stream_async(
+    resolver: Type[BaseResolver],
+    columns: Sequence[str],
+    header: Optional[Header],
+    encode: Encoder,
+) -> AsyncIterator[str]:
+    if header is not None:
+        yield header(columns)
+    async with AsyncSessionLocal() as db:
+        async for batch in resolver.stream_async(db, columns):
+            yield encode(columns, batch)
+
+
+def export_response(
+    resolver: Type[BaseResolver],
+    filename: str,
+    format: str = "ndjson",
+    columns: Optional[str] = None,
+) -> StreamingResponse:
+    """Stream every row of `resolver.model` as NDJSON or CSV
+
+    `columns` is a comma-separated subset of the model's columns (all by
+    default). Rows are read in batches from a server-side cursor and each
+    batch is encoded and handed to the ASGI server before the next is
+    fetched, so a slow client slows the cursor down instead of making the
+    export buffer.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format {format!r}; use one of {', '.join(EXPORT_FORMATS)}",
+        )
+    media_type, header, encode = EXPORT_FORMATS[format]
+
+    table_columns = list(resolver.model.__table__.c.keys())
+    names = [name.strip() for name in columns.split(",")] if columns else table_columns
+    unknown = [name for name in names if name not in table_columns]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown)}"
+        )
+
+    stream = _stream_async if is_async_mode() else _stream_sync
+    return StreamingResponse(
+        stream(resolver, names, header, encode),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
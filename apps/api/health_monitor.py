@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .metrics import LatencyHistogram
+from .replicas import replica_router
+
+
+@dataclass
+class HealthSnapshot:
+    database: Dict[str, Any] = field(
+        default_factory=lambda: {
+            "status": "unknown",
+            "connection": False,
+            "details": "Not probed yet",
+            "latency_ms": None,
+            "replication_lag_seconds": None,
+        }
+    )
+    pool: Dict[str, Any] = field(default_factory=dict)
+    checked_at: Optional[datetime] = None
+    checked_at_monotonic: Optional[float] = None
+    stale_after: float = 0.0
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        if self.checked_at_monotonic is None:
+            return None
+        return time.monotonic() - self.checked_at_monotonic
+
+    @property
+    def stale(self) -> bool:
+        age = self.age_seconds
+        return age is None or age > self.stale_after
+
+
+class HealthMonitor:
+    """Probes the database on an interval and caches the result
+
+    Liveness and readiness checks only read `snapshot`, so no matter how
+    often load balancers poll, the database sees one `SELECT 1` per
+    interval. Where no background task is running (e.g. a serverless
+    invocation that skipped the lifespan) `current` refreshes in-line, at
+    most once per interval across concurrent callers.
+    """
+
+    def __init__(self, interval: float, stale_after: float) -> None:
+        self.interval = interval
+        self.stale_after = stale_after
+        self.latency = LatencyHistogram()
+        self.snapshot = HealthSnapshot(stale_after=stale_after)
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls) -> "HealthMonitor":
+        interval = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+        stale_after = float(os.getenv("HEALTH_STALE_AFTER", str(interval * 3)))
+        return cls(interval=interval, stale_after=stale_after)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh(self) -> HealthSnapshot:
+        """Probe now, without blocking the event loop, and publish the snapshot"""
+        # Imported here so importing the monitor never imports the database
+        # module, which itself imports the instrumentation this module feeds
+        from .resolvers.health import HealthResolver
+
+        database_status = await HealthResolver.probe()
+        if database_status["latency_ms"] is not None:
+            self.latency.observe(database_status["latency_ms"])
+
+        self.snapshot = HealthSnapshot(
+            database=database_status,
+            pool=HealthResolver.pool_stats(),
+            checked_at=datetime.now(timezone.utc),
+            checked_at_monotonic=time.monotonic(),
+            stale_after=self.stale_after,
+        )
+        return self.snapshot
+
+    async def current(self) -> HealthSnapshot:
+        """The cached snapshot, refreshed in-line only when nothing else will"""
+        age = self.snapshot.age_seconds
+        if self.running or (age is not None and age < self.interval):
+            return self.snapshot
+
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            # Another caller may have refreshed while we waited
+            age = self.snapshot.age_seconds
+            if age is None or age >= self.interval:
+                await self.refresh()
+        return self.snapshot
+
+    def readiness(self, snapshot: HealthSnapshot) -> Dict[str, Any]:
+        readiness = {
+            "ready": snapshot.database["status"] == "ok" and not snapshot.stale,
+            "checked_at": snapshot.checked_at,
+            "age_seconds": snapshot.age_seconds,
+            "stale": snapshot.stale,
+            "database": snapshot.database,
+            "pool": snapshot.pool,
+            "probe_latency_ms": self.latency.snapshot(),
+        }
+        # Replicas never decide readiness; the primary can serve every read
+        if replica_router is not None:
+            readiness["replicas"] = replica_router.stats()["replicas"]
+        return readiness
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # probe_database reports its own failures; never let the loop die
+                pass
+            await asyncio.sleep(self.interval)
+
+
+health_monitor = HealthMonitor.from_env()
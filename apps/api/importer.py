@@ -0,0 +1,414 @@
+"""Bulk-load notes from NDJSON or CSV
+
+Rows are validated against `CreateNoteInput` a chunk at a time and each
+valid chunk is written with `BaseResolver.bulk_copy` (Postgres `COPY`) in
+its own transaction, so memory stays bounded by the chunk size and a bad
+row only costs itself. Also runnable as a CLI:
+
+    python -m apps.api.importer notes.ndjson
+    cat notes.csv | python -m apps.api.importer - --format csv
+"""
+
+import argparse
+import codecs
+import csv
+import dataclasses
+import json
+import os
+import sys
+import time
+import typing
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+
+from .cache import query_cache
+from .database import AsyncSessionLocal, get_db, is_async_mode
+from .resolvers.base import BaseResolver
+
+IMPORT_FORMATS = ("ndjson", "csv")
+# Rows validated and copied per transaction
+IMPORT_CHUNK_SIZE = 10000
+# Rejected rows listed individually in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# Largest request body the HTTP endpoint accepts; the CLI has no limit
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+TRUE_VALUES = {"true", "t", "1", "yes", "y"}
+FALSE_VALUES = {"false", "f", "0", "no", "n"}
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # Id ranges the copied chunks may have used, for cache invalidation
+    id_ranges: List[range] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def reject(self, line: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": self.errors,
+        }
+
+
+def _coerce(name: str, value: Any, annotation: Any, from_csv: bool) -> Any:
+    optional = type(None) in typing.get_args(annotation)
+    base = next(
+        (arg for arg in typing.get_args(annotation) if arg is not type(None)),
+        annotation,
+    )
+
+    if value is None or (from_csv and value == "" and optional):
+        if optional:
+            return None
+        raise ValueError(f"{name} is required")
+    if base is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in TRUE_VALUES:
+            return True
+        if isinstance(value, str) and value.strip().lower() in FALSE_VALUES:
+            return False
+    elif base is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if from_csv and isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value)
+    elif isinstance(value, base):
+        return value
+    raise ValueError(f"{name} must be {getattr(base, '__name__', base)}")
+
+
+class RowValidator:
+    """Checks raw records against the fields of a Strawberry input type"""
+
+    def __init__(self, input_type: Type) -> None:
+        hints = typing.get_type_hints(input_type)
+        self.fields = [
+            (f.name, hints[f.name], f.default) for f in dataclasses.fields(input_type)
+        ]
+        self.columns = [name for name, _, _ in self.fields]
+
+    def validate(self, record: Any, from_csv: bool = False) -> Tuple[Any, ...]:
+        if not isinstance(record, dict):
+            raise ValueError("row must be an object")
+        unknown = set(record) - set(self.columns)
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+        values = []
+        for name, annotation, default in self.fields:
+            if name not in record and default is not dataclasses.MISSING:
+                values.append(default)
+            else:
+                values.append(_coerce(name, record.get(name), annotation, from_csv))
+        return tuple(values)
+
+
+class ChunkParser:
+    """Turns numbered text lines into validated rows, one chunk at a time"""
+
+    def __init__(self, format: str, validator: RowValidator) -> None:
+        if format not in IMPORT_FORMATS:
+            raise ValueError(
+                f"Unknown format {format!r}; use one of {', '.join(IMPORT_FORMATS)}"
+            )
+        self.format = format
+        self.validator = validator
+        self.header: Optional[List[str]] = None
+
+    def parse(
+        self, lines: Sequence[Tuple[int, str]], report: ImportReport
+    ) -> List[Tuple[Any, ...]]:
+        rows = []
+        for number, record in self._records(lines, report):
+            try:
+                rows.append(
+                    self.validator.validate(record, from_csv=self.format == "csv")
+                )
+            except ValueError as error:
+                report.reject(number, str(error))
+        return rows
+
+    def _records(
+        self, lines: Sequence[Tuple[int, str]], report: ImportReport
+    ) -> Iterator[Tuple[int, Any]]:
+        if self.format == "ndjson":
+            for number, line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as error:
+                    report.reject(number, f"invalid JSON: {error.msg}")
+            return
+
+        # CSV: the first line is the header; a quoted newline inside a field
+        # is not supported, since chunks are split on lines
+        for number, values in zip(
+            (number for number, _ in lines), csv.reader(line for _, line in lines)
+        ):
+            if self.header is None:
+                self.header = [name.strip() for name in values]
+                continue
+            if not values:
+                continue
+            if len(values) != len(self.header):
+                report.reject(
+                    number, f"expected {len(self.header)} values, got {len(values)}"
+                )
+                continue
+            yield number, dict(zip(self.header, values))
+
+
+def _chunks(
+    lines: Iterable[str], size: int = IMPORT_CHUNK_SIZE
+) -> Iterator[List[Tuple[int, str]]]:
+    chunk: List[Tuple[int, str]] = []
+    for number, line in enumerate(lines, start=1):
+        chunk.append((number, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _limited(
+    byte_chunks: AsyncIterable[bytes], max_bytes: int
+) -> typing.AsyncIterator[bytes]:
+    received = 0
+    async for data in byte_chunks:
+        received += len(data)
+        if received > max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"Imports are limited to {max_bytes} bytes"
+            )
+        yield data
+
+
+async def _chunks_async(
+    byte_chunks: AsyncIterable[bytes], size: int = IMPORT_CHUNK_SIZE
+) -> typing.AsyncIterator[List[Tuple[int, str]]]:
+    """Split a streamed request body into numbered lines without buffering it"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    number = 0
+    chunk: List[Tuple[int, str]] = []
+    async for data in byte_chunks:
+        pending += decoder.decode(data)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            number += 1
+            chunk.append((number, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        chunk.append((number + 1, pending))
+    if chunk:
+        yield chunk
+
+
+def import_lines(
+    resolver: Type[BaseResolver],
+    input_type: Type,
+    lines: Iterable[str],
+    format: str,
+) -> ImportReport:
+    """Validate and COPY `lines` chunk by chunk on the sync engine"""
+    validator = RowValidator(input_type)
+    parser = ChunkParser(format, validator)
+    report = ImportReport()
+    started = time.perf_counter()
+
+    db = next(get_db())
+    try:
+        for chunk in _chunks(lines):
+            rows = parser.parse(chunk, report)
+            _copy_chunk(resolver, db, validator.columns, rows, report)
+    finally:
+        db.close()
+        _invalidate(resolver, report)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+async def import_stream_async(
+    resolver: Type[BaseResolver],
+    input_type: Type,
+    byte_chunks: AsyncIterable[bytes],
+    format: str,
+) -> ImportReport:
+    """Validate and COPY a streamed body chunk by chunk on the async engine"""
+    validator = RowValidator(input_type)
+    parser = ChunkParser(format, validator)
+    report = ImportReport()
+    started = time.perf_counter()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            async for chunk in _chunks_async(byte_chunks):
+                rows = parser.parse(chunk, report)
+                await _copy_chunk_async(resolver, db, validator.columns, rows, report)
+    finally:
+        _invalidate(resolver, report)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _max_id(resolver: Type[BaseResolver]) -> Any:
+    return select(func.max(resolver.model.id))
+
+
+def _copy_chunk(
+    resolver: Type[BaseResolver],
+    db: Any,
+    columns: Sequence[str],
+    rows: Sequence[Tuple[Any, ...]],
+    report: ImportReport,
+) -> None:
+    """COPY one chunk and note the ids it took
+
+    COPY returns no ids. Sequence values only grow, so the chunk's rows
+    lie between the highest id before and after it (alongside any
+    concurrent inserts, whose invalidation does no harm).
+    """
+    if not rows:
+        return
+    before = db.scalar(_max_id(resolver)) or 0
+    report.imported += resolver.bulk_copy(db, columns, rows)
+    report.id_ranges.append(range(before + 1, (db.scalar(_max_id(resolver)) or 0) + 1))
+
+
+async def _copy_chunk_async(
+    resolver: Type[BaseResolver],
+    db: Any,
+    columns: Sequence[str],
+    rows: Sequence[Tuple[Any, ...]],
+    report: ImportReport,
+) -> None:
+    if not rows:
+        return
+    before = await db.scalar(_max_id(resolver)) or 0
+    report.imported += await resolver.bulk_copy_async(db, columns, rows)
+    after = await db.scalar(_max_id(resolver)) or 0
+    report.id_ranges.append(range(before + 1, after + 1))
+
+
+def _invalidate(resolver: Type[BaseResolver], report: ImportReport) -> None:
+    # As after bulk_create: list and search results, and every new id's
+    # cached lookups (including cached misses)
+    if query_cache is not None and report.imported:
+        query_cache.invalidate(
+            resolver.model.__tablename__,
+            (id for ids in report.id_ranges for id in ids),
+        )
+
+
+async def import_request(
+    resolver: Type[BaseResolver],
+    input_type: Type,
+    body: AsyncIterable[bytes],
+    format: str,
+    content_length: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> ImportReport:
+    """Import a streamed HTTP body on whichever database path is configured
+
+    Bodies over `max_bytes` (default IMPORT_MAX_BYTES) are refused up
+    front when they declare their length; chunked ones stop at the limit,
+    keeping the chunks already copied.
+    """
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format {format!r}; use one of {', '.join(IMPORT_FORMATS)}",
+        )
+    if max_bytes is None:
+        max_bytes = IMPORT_MAX_BYTES
+    if content_length is not None and content_length > max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Imports are limited to {max_bytes} bytes"
+        )
+    body = _limited(body, max_bytes)
+    if is_async_mode():
+        return await import_stream_async(resolver, input_type, body, format)
+
+    # Sync mode: read the body here and COPY each chunk on a worker thread
+    validator = RowValidator(input_type)
+    parser = ChunkParser(format, validator)
+    report = ImportReport()
+    started = time.perf_counter()
+
+    db = next(get_db())
+    try:
+        async for chunk in _chunks_async(body):
+            rows = parser.parse(chunk, report)
+            await run_in_threadpool(
+                _copy_chunk, resolver, db, validator.columns, rows, report
+            )
+    finally:
+        db.close()
+        _invalidate(resolver, report)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    from .resolvers.note import NoteResolver
+    from .types.note import CreateNoteInput
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument(
+        "--format",
+        choices=IMPORT_FORMATS,
+        help="defaults to the file extension, else ndjson",
+    )
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    if args.path == "-":
+        report = import_lines(NoteResolver, CreateNoteInput, sys.stdin, format)
+    else:
+        with open(args.path, newline="", encoding="utf-8") as file:
+            report = import_lines(NoteResolver, CreateNoteInput, file, format)
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,69 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from .admin import require_admin
+from .cache import query_cache
+from .metrics import ServerTimingMiddleware, operation_metrics, render_pool
+from .replicas import ConsistencyMiddleware, replica_router
+
+# Everything else (Strawberry, the schema, the ORM and the optional
+# features) is imported by the routes that use it, so a cold start only
+# pays for what its first request needs; see docs/deployment.md
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from . import database
+    from .health_monitor import health_monitor
+    from .pubsub import change_listener
+
+    warm_up = (
+        asyncio.create_task(database.warm_up()) if database.DATABASE_WARMUP else None
+    )
+    health_monitor.start()
+    change_listener.start()
+    yield
+    await change_listener.stop()
+    await health_monitor.stop()
+    if warm_up is not None:
+        warm_up.cancel()
+
+
+class GraphQLApp:
+    """The GraphQL router, built with the schema on the first request
+
+    Serves HTTP and WebSocket requests to /graphql. The router is kept for
+    the life of the process, so warm invocations reuse the schema.
+    """
+
+    def __init__(self) -> None:
+        self._router: Optional[Any] = None
 
-from .schema import schema
+    @property
+    def router(self) -> Any:
+        if self._router is None:
+            from .context import get_context
+            from .persisted_queries import PersistedQueryRouter
+            from .schema import schema
 
-app = FastAPI(root_path="/api")
+            self._router = PersistedQueryRouter(
+                schema, path="/graphql", context_getter=get_context
+            )
+        return self._router
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        await self.router(scope, receive, send)
+
+
+app = FastAPI(root_path="/api", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,10 +73,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-router = GraphQLRouter(schema, path="/graphql")
-app.include_router(router)
+app.add_middleware(ServerTimingMiddleware)
+
+if replica_router is not None:
+    app.add_middleware(
+        ConsistencyMiddleware, sticky_seconds=replica_router.sticky_seconds
+    )
+
+graphql_app = GraphQLApp()
+app.router.add_route("/graphql", graphql_app, include_in_schema=False)
+app.router.add_websocket_route("/graphql", graphql_app)
 
 
 @app.get("/health")
+@app.get("/health/live")
 def health():
     return {"ok": True}
+
+
+@app.get("/health/ready")
+async def readiness():
+    from .health_monitor import health_monitor
+
+    readiness = health_monitor.readiness(await health_monitor.current())
+    return JSONResponse(
+        jsonable_encoder(readiness), status_code=200 if readiness["ready"] else 503
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    from .resolver_executor import resolver_executor
+    from .resolvers.health import HealthResolver
+
+    body = operation_metrics.render() + render_pool(HealthResolver.pool_stats())
+    if resolver_executor is not None:
+        body += resolver_executor.render()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    if query_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **query_cache.stats()}
+
+
+@app.get("/debug/queries", dependencies=[Depends(require_admin)])
+def query_log(kind: Optional[str] = None, limit: int = 50):
+    from .query_profiler import query_profiler
+
+    if query_profiler is None:
+        return {"enabled": False}
+    entries = query_profiler.recent(kind, limit)
+    return {
+        "enabled": True,
+        **query_profiler.stats(),
+        "queries": [entry.as_dict() for entry in entries],
+    }
+
+
+@app.delete("/debug/queries", dependencies=[Depends(require_admin)])
+def clear_query_log():
+    from .query_profiler import query_profiler
+
+    if query_profiler is not None:
+        query_profiler.clear()
+    return {"cleared": query_profiler is not None}
+
+
+@app.get("/export/notes")
+def export_notes(format: str = "ndjson", columns: Optional[str] = None):
+    from .export import export_response
+    from .resolvers.note import NoteResolver
+
+    return export_response(NoteResolver, "notes", format=format, columns=columns)
+
+
+@app.post("/import/notes", dependencies=[Depends(require_admin)])
+async def import_notes(request: Request, format: str = "ndjson"):
+    from .importer import import_request
+    from .resolvers.note import NoteResolver
+    from .types.note import CreateNoteInput
+
+    length = request.headers.get("content-length")
+    report = await import_request(
+        NoteResolver,
+        CreateNoteInput,
+        request.stream(),
+        format,
+        content_length=int(length) if length and length.isdigit() else None,
+    )
+    return report.as_dict()
+
+
+@app.post("/maintenance/purge-tombstones", dependencies=[Depends(require_admin)])
+async def purge_tombstones():
+    """Hard-delete note tombstones past TOMBSTONE_RETENTION_DAYS; run on a schedule"""
+    from starlette.concurrency import run_in_threadpool
+
+    from .database import AsyncSessionLocal, get_db, is_async_mode
+    from .resolvers.note import NoteResolver
+
+    if is_async_mode():
+        async with AsyncSessionLocal() as db:
+            return {"purged": await NoteResolver.purge_tombstones_async(db)}
+
+    db = next(get_db())
+    try:
+        return {"purged": await run_in_threadpool(NoteResolver.purge_tombstones, db)}
+    finally:
+        db.close()
@@ -0,0 +1,202 @@
+"""Per-request timings: SQL, pool waits, GraphQL phases and resolvers
+
+These hooks fill in the `RequestMetrics` that `metrics.ServerTimingMiddleware`
+opens for every HTTP request:
+
+* engine hooks count statements and time them (`instrument_engine`),
+* the timed pool classes record how long checkouts waited,
+* `RequestInstrumentation` times parse/validate/execute, and
+  `ResolverTiming` (GRAPHQL_RESOLVER_TIMING=1) also every field that has
+  its own resolver.
+"""
+
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from graphql import GraphQLResolveInfo
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from strawberry.extensions import SchemaExtension
+
+from .metrics import RequestMetrics, current_metrics
+
+TIMING_EXTENSIONS = os.getenv("GRAPHQL_TIMING_EXTENSIONS", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+RESOLVER_TIMING = os.getenv("GRAPHQL_RESOLVER_TIMING", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    # On the execution context, not the pooled connection: a statement that
+    # raises never reaches after_cursor_execute, and its start time goes
+    # away with its context
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    started = getattr(context, "query_started", None)
+    metrics = current_metrics.get()
+    if metrics is not None and started is not None:
+        metrics.statements += 1
+        metrics.db_ms += (time.perf_counter() - started) * 1000
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute statement counts and time on `engine` to the current request
+
+    For an AsyncEngine pass its `sync_engine`; SQLAlchemy carries the
+    context variable into the greenlet the driver calls run in.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.pool_wait_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def timed_pool_class(url: str) -> Optional[type]:
+    """The timed version of the pool `url` gets by default, if it has one"""
+    parsed = make_url(url)
+    default = parsed.get_dialect().get_pool_class(parsed)
+    if issubclass(default, AsyncAdaptedQueuePool):
+        return TimedAsyncAdaptedQueuePool
+    if issubclass(default, QueuePool):
+        return TimedQueuePool
+    return None
+
+
+_custom_resolvers: Dict[Tuple[str, str], bool] = {}
+
+
+def has_resolver(info: GraphQLResolveInfo) -> bool:
+    """Whether the field has its own resolver rather than attribute access"""
+    key = (info.parent_type.name, info.field_name)
+    custom = _custom_resolvers.get(key)
+    if custom is None:
+        definition = info.parent_type.fields[info.field_name].extensions.get(
+            "strawberry-definition"
+        )
+        custom = getattr(definition, "base_resolver", None) is not None
+        _custom_resolvers[key] = custom
+    return custom
+
+
+class RequestInstrumentation(SchemaExtension):
+    """Times GraphQL phases into the request's metrics
+
+    With GRAPHQL_TIMING_EXTENSIONS=1 the same figures are returned under
+    `extensions.timing`.
+    """
+
+    def _metrics(self) -> Optional[RequestMetrics]:
+        return current_metrics.get()
+
+    def _timed(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        yield
+        metrics = self._metrics()
+        if metrics is not None:
+            metrics.phases[phase] = (time.perf_counter() - started) * 1000
+
+    def _name_operation(self) -> None:
+        metrics = self._metrics()
+        if metrics is not None:
+            name = self.execution_context.operation_name
+            metrics.operation = name or "anonymous"
+
+    def on_operation(self) -> Iterator[None]:
+        yield
+        # Also covers operations that failed before they could execute
+        self._name_operation()
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._timed("parse")
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._timed("validate")
+
+    def on_execute(self) -> Iterator[None]:
+        # Named up front so statements run while executing can be attributed
+        self._name_operation()
+        yield from self._timed("execute")
+
+    def get_results(self) -> Dict[str, Any]:
+        metrics = self._metrics()
+        if not TIMING_EXTENSIONS or metrics is None:
+            return {}
+        return {"timing": metrics.as_dict()}
+
+
+class ResolverTiming(RequestInstrumentation):
+    """Also times every field that has its own resolver
+
+    Strawberry only wraps field resolution when an extension defines
+    `resolve`, and that wrapper runs for every field of every row (about
+    10% of a 50-note list), so this is opt-in. Fields resolved by plain
+    attribute access are passed straight through.
+    """
+
+    def resolve(
+        self,
+        _next: Callable,
+        root: Any,
+        info: GraphQLResolveInfo,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        metrics = self._metrics()
+        if metrics is None or not has_resolver(info):
+            return _next(root, info, *args, **kwargs)
+
+        name = f"{info.parent_type.name}.{info.field_name}"
+        started = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if not inspect.isawaitable(result):
+            metrics.add_resolver(name, (time.perf_counter() - started) * 1000)
+            return result
+
+        async def timed() -> Any:
+            try:
+                return await result
+            finally:
+                metrics.add_resolver(name, (time.perf_counter() - started) * 1000)
+
+        return timed()
@@ -0,0 +1,257 @@
+"""Request metrics with no dependencies beyond the standard library
+
+`ServerTimingMiddleware` opens a `RequestMetrics` for every HTTP request
+and stores it in `current_metrics`; the engine hooks and GraphQL
+extensions in `instrumentation` fill it in. When the response starts, the
+totals go out as a `Server-Timing` header and into the per-operation
+Prometheus histograms served at `/metrics`.
+
+Kept free of SQLAlchemy and Strawberry so the app can install the
+middleware without importing either.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default bucket upper bounds, sized for the health probe, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram in the Prometheus bucket layout"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative: List[int] = []
+            running = 0
+            for count in self._counts:
+                running += count
+                cumulative.append(running)
+        labels = [str(bucket) for bucket in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, cumulative)),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+# Request latency buckets, in milliseconds
+REQUEST_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Distinct `operation` labels kept before the rest share "other"
+MAX_OPERATION_LABELS = int(os.getenv("METRICS_MAX_OPERATIONS", "100"))
+# Slowest resolvers listed in the Server-Timing header
+SERVER_TIMING_RESOLVERS = 5
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class RequestMetrics:
+    operation: Optional[str] = None
+    statements: int = 0
+    db_ms: float = 0.0
+    pool_wait_ms: float = 0.0
+    # GraphQL phase -> milliseconds
+    phases: Dict[str, float] = field(default_factory=dict)
+    # "Type.field" -> (calls, total milliseconds)
+    resolvers: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+    # Statement shape -> (executions, total milliseconds), kept while the
+    # query profiler is on
+    statement_shapes: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+    # Statement shape -> its N+1 entry in the query log, updated as it repeats
+    repeated_statements: Dict[str, Any] = field(default_factory=dict)
+
+    def add_resolver(self, name: str, elapsed_ms: float) -> None:
+        calls, total = self.resolvers.get(name, (0, 0.0))
+        self.resolvers[name] = (calls + 1, total + elapsed_ms)
+
+    def slowest_resolvers(self, limit: int) -> List[Tuple[str, int, float]]:
+        ranked = sorted(self.resolvers.items(), key=lambda item: -item[1][1])
+        return [(name, calls, total) for name, (calls, total) in ranked[:limit]]
+
+    def server_timing(self, total_ms: float) -> str:
+        entries = [
+            f'sql;desc="{self.statements} statements";dur={self.db_ms:.2f}',
+            f"pool;dur={self.pool_wait_ms:.2f}",
+        ]
+        entries += [f"{phase};dur={ms:.2f}" for phase, ms in self.phases.items()]
+        entries += [
+            f'resolver;desc="{name} x{calls}";dur={total:.2f}'
+            for name, calls, total in self.slowest_resolvers(SERVER_TIMING_RESOLVERS)
+        ]
+        entries.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "dbMs": round(self.db_ms, 3),
+            "poolWaitMs": round(self.pool_wait_ms, 3),
+            "phasesMs": {phase: round(ms, 3) for phase, ms in self.phases.items()},
+            "resolvers": [
+                {"field": name, "calls": calls, "totalMs": round(total, 3)}
+                for name, calls, total in self.slowest_resolvers(len(self.resolvers))
+            ],
+        }
+
+
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+class OperationMetrics:
+    """Prometheus histograms and counters per operation name"""
+
+    def __init__(self, max_labels: int = MAX_OPERATION_LABELS) -> None:
+        self.max_labels = max_labels
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.statements: Dict[str, int] = {}
+        self.db_ms: Dict[str, float] = {}
+        self.pool_wait_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self, operation: str, elapsed_ms: float, metrics: RequestMetrics
+    ) -> None:
+        with self._lock:
+            if operation not in self.latency:
+                if len(self.latency) >= self.max_labels:
+                    # Operation names come from clients; keep cardinality bounded
+                    operation = "other"
+                self.latency.setdefault(operation, LatencyHistogram(REQUEST_BUCKETS_MS))
+            self.statements[operation] = (
+                self.statements.get(operation, 0) + metrics.statements
+            )
+            self.db_ms[operation] = self.db_ms.get(operation, 0.0) + metrics.db_ms
+            self.pool_wait_ms[operation] = (
+                self.pool_wait_ms.get(operation, 0.0) + metrics.pool_wait_ms
+            )
+        self.latency[operation].observe(elapsed_ms)
+
+    def render(self) -> str:
+        """The Prometheus text exposition format, in seconds"""
+        lines = [
+            "# HELP api_request_duration_seconds Request latency by operation",
+            "# TYPE api_request_duration_seconds histogram",
+        ]
+        for operation, histogram in sorted(self.latency.items()):
+            label = _label(operation)
+            snapshot = histogram.snapshot()
+            for bucket, count in snapshot["buckets"].items():
+                le = bucket if bucket == "+Inf" else _seconds(float(bucket))
+                lines.append(
+                    f'api_request_duration_seconds_bucket{{{label},le="{le}"}} {count}'
+                )
+            lines.append(
+                f"api_request_duration_seconds_sum{{{label}}} "
+                f"{_seconds(snapshot['sum'])}"
+            )
+            lines.append(
+                f"api_request_duration_seconds_count{{{label}}} {snapshot['count']}"
+            )
+
+        for name, help_text, values, scale in (
+            ("api_sql_statements_total", "SQL statements", self.statements, None),
+            ("api_db_seconds_total", "Time spent in SQL", self.db_ms, _seconds),
+            (
+                "api_pool_wait_seconds_total",
+                "Time spent waiting for a pooled connection",
+                self.pool_wait_ms,
+                _seconds,
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for operation, value in sorted(values.items()):
+                rendered = scale(value) if scale else value
+                lines.append(f"{name}{{{_label(operation)}}} {rendered}")
+        return "\n".join(lines) + "\n"
+
+
+# Gauges from `HealthResolver.pool_stats`, when the pool has them
+POOL_GAUGES = (
+    ("size", "Connections the pool keeps open"),
+    ("checked_out", "Connections in use"),
+    ("overflow", "Connections beyond the pool size (negative while below it)"),
+)
+
+
+def render_pool(stats: Dict[str, Any]) -> str:
+    """The resolvers' pool as Prometheus gauges, labelled by strategy"""
+    label = f'strategy="{stats.get("strategy", "")}"'
+    lines = []
+    for key, help_text in POOL_GAUGES:
+        if stats.get(key) is None:
+            continue
+        name = f"api_db_pool_{key}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines.append(f"{name}{{{label}}} {stats[key]}")
+    return "".join(line + "\n" for line in lines)
+
+
+def _seconds(milliseconds: float) -> str:
+    return repr(milliseconds / 1000)
+
+
+def _label(operation: str) -> str:
+    escaped = operation.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'operation="{escaped}"'
+
+
+operation_metrics = OperationMetrics()
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware, so streamed responses are not buffered"""
+
+    def __init__(self, app: Callable, exclude: Tuple[str, ...] = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start" and SERVER_TIMING:
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", metrics.server_timing(total_ms).encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_metrics.reset(token)
+            operation = metrics.operation or f"{scope['method']} {scope['path']}"
+            operation_metrics.observe(
+                operation, (time.perf_counter() - started) * 1000, metrics
+            )
@@ -1,20 +1,53 @@
-from datetime import datetime, timezone
-
 from sqlalchemy import Column, DateTime, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 
 from ..database import Base
 
 
+class utcnow(FunctionElement):
+    """Current UTC time as a naive timestamp, evaluated by the database"""
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has whole seconds; sync watermarks need finer steps.
+    # SQLite compares the text, so match SQLAlchemy's six-digit microseconds.
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+
 class BaseModel(Base):
     __abstract__ = True
 
     id = Column(Integer, primary_key=True, index=True)
+    # Stamped by the database, never the app host, so every writer and the
+    # sync horizon read one clock. `default` covers ORM/Core inserts, the
+    # server default COPY and raw SQL.
     created_at = Column(
-        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+        DateTime,
+        default=utcnow(),
+        server_default=utcnow(),
+        nullable=False,
     )
     updated_at = Column(
         DateTime,
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc),
+        default=utcnow(),
+        onupdate=utcnow(),
+        server_default=utcnow(),
         nullable=False,
     )
+    # Set instead of deleting the row, so incremental syncs can report it
+    deleted_at = Column(DateTime, nullable=True)
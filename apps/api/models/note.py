@@ -1,10 +1,48 @@
-from sqlalchemy import Boolean, Column, String, Text
+from sqlalchemy import Boolean, Column, Index, String, Text, text
 
 from apps.api.models.base import BaseModel
 
 
 class Note(BaseModel):
     __tablename__ = "note"
+    __table_args__ = (
+        # Range scans for `notes(filter:, orderBy:)`; the trailing id matches
+        # the tie-breaker BaseResolver appends to every ORDER BY. Indexes
+        # serving live reads skip tombstones; syncs use ix_note_updated_at_id.
+        Index(
+            "ix_note_is_published_created_at_id",
+            "is_published",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_note_is_published_updated_at_id",
+            "is_published",
+            "updated_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_note_updated_at_id", "updated_at", "id"),
+        # Small index for the hot "published, newest first" listing
+        Index(
+            "ix_note_published_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text("is_published AND deleted_at IS NULL"),
+            sqlite_where=text("is_published AND deleted_at IS NULL"),
+        ),
+        # LIKE 'prefix%' can only use a btree under pattern ops (or C collation)
+        Index(
+            "ix_note_title_prefix",
+            "title",
+            postgresql_ops={"title": "varchar_pattern_ops"},
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     title = Column(String, nullable=False, index=True)
     content = Column(Text)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Iterator, Optional, TypeVar
+
+from graphql import DocumentNode, GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+
+ValueType = TypeVar("ValueType")
+
+
+class BoundedLRU(Generic[ValueType]):
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, ValueType]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[ValueType]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: ValueType) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedDocument:
+    def __init__(self, document: DocumentNode) -> None:
+        self.document = document
+        self.validated = False
+
+
+CACHE_SIZE = int(os.getenv("PERSISTED_QUERY_CACHE_SIZE", "1000"))
+# Cache-Control max-age for persisted queries fetched with GET; 0 sends none
+MAX_AGE = int(os.getenv("PERSISTED_QUERY_MAX_AGE", "0"))
+
+# sha256 -> query text registered through APQ
+query_store: BoundedLRU[str] = BoundedLRU(CACHE_SIZE)
+# sha256 -> parsed document, plus whether it already passed validation
+document_cache: BoundedLRU[CachedDocument] = BoundedLRU(CACHE_SIZE)
+
+
+def sha256_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueries(SchemaExtension):
+    """Automatic persisted queries plus a parsed-document cache
+
+    A request may send only `extensions.persistedQuery.sha256Hash`; if the
+    hash is unknown the client gets `PersistedQueryNotFound` and retries
+    with the query text, which registers it. Every document, persisted or
+    not, is parsed and validated once per process and then reused by hash.
+    """
+
+    digest: Optional[str] = None
+
+    def on_operation(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        extensions = execution_context.operation_extensions or {}
+        persisted = extensions.get("persistedQuery")
+
+        if persisted is not None:
+            self.digest = self._resolve_persisted_query(persisted)
+        elif execution_context.query:
+            self.digest = sha256_hash(execution_context.query)
+        yield
+        if persisted is not None:
+            self._set_cache_headers()
+
+    def on_parse(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        cached = document_cache.get(self.digest) if self.digest else None
+        if cached is not None:
+            execution_context.graphql_document = cached.document
+        yield
+        if cached is None and self.digest and execution_context.graphql_document:
+            document_cache.set(
+                self.digest, CachedDocument(execution_context.graphql_document)
+            )
+
+    def on_validate(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        cached = document_cache.get(self.digest) if self.digest else None
+        if cached is not None and cached.validated:
+            # An empty error list tells Strawberry validation already ran
+            execution_context.pre_execution_errors = []
+        yield
+        if cached is not None and not execution_context.pre_execution_errors:
+            cached.validated = True
+
+    def _resolve_persisted_query(self, persisted: Any) -> str:
+        execution_context = self.execution_context
+        if not isinstance(persisted, dict):
+            persisted = {}
+        digest = persisted.get("sha256Hash")
+        if persisted.get("version") != 1 or not isinstance(digest, str):
+            raise GraphQLError(
+                "Unsupported persisted query",
+                extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+            )
+
+        if execution_context.query is None:
+            query = query_store.get(digest)
+            if query is None:
+                raise GraphQLError(
+                    "PersistedQueryNotFound",
+                    extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                )
+            execution_context.query = query
+        elif sha256_hash(execution_context.query) != digest:
+            raise GraphQLError(
+                "provided sha does not match query",
+                extensions={"code": "INVALID_SHA256_HASH"},
+            )
+        else:
+            query_store.set(digest, execution_context.query)
+        return digest
+
+    def _set_cache_headers(self) -> None:
+        # Only once the result is known: errors, including transient ones,
+        # must never be cached by a CDN
+        execution_context = self.execution_context
+        result = execution_context.result
+        if result is None or result.errors or execution_context.pre_execution_errors:
+            return
+        context = execution_context.context
+        request = getattr(context, "request", None)
+        response = getattr(context, "response", None)
+        if MAX_AGE > 0 and request is not None and request.method == "GET":
+            response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}"
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that answers hash-only GET requests instead of the IDE"""
+
+    def should_render_graphql_ide(self, request: Any) -> bool:
+        return super().should_render_graphql_ide(request) and (
+            "extensions" not in request.query_params
+        )
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+)
+
+from sqlalchemy.engine import make_url
+
+from . import database
+
+# NOTIFY channel the row-change trigger publishes on
+CHANGES_CHANNEL = "row_changes"
+CHANGE_ACTIONS = ("created", "updated", "deleted")
+
+
+@dataclass
+class ChangeEvent:
+    """One row of `model` (a table name) was created, updated or deleted"""
+
+    model: str
+    action: str
+    id: int
+    _item: Optional["asyncio.Future[Any]"] = field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def topic(self) -> str:
+        return f"{self.model}:{self.action}"
+
+    async def item(self, load: Callable[[int], Awaitable[Any]]) -> Any:
+        """The changed row, loaded once no matter how many subscribers ask"""
+        if self._item is None:
+            self._item = asyncio.ensure_future(load(self.id))
+        # One subscriber disconnecting must not cancel the others' load
+        return await asyncio.shield(self._item)
+
+
+class SubscriberDropped(Exception):
+    """The subscriber's queue filled up and it was disconnected"""
+
+
+_DROPPED = object()
+
+
+class Subscriber:
+    """A bounded queue of events for one subscription"""
+
+    def __init__(self, hub: "ChangeHub", topic: str, max_queue: int) -> None:
+        self.hub = hub
+        self.topic = topic
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, event: ChangeEvent) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self) -> None:
+        # Discard the backlog so the sentinel fits and arrives next
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_DROPPED)
+
+    def __aiter__(self) -> "Subscriber":
+        return self
+
+    async def __anext__(self) -> ChangeEvent:
+        event = await self.queue.get()
+        if event is _DROPPED:
+            raise SubscriberDropped(
+                "Subscription dropped: the client fell behind the change stream"
+            )
+        return event
+
+    def __enter__(self) -> "Subscriber":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """In-process fan-out of change events to subscribers
+
+    `publish` never waits: every subscriber has its own bounded queue and
+    one that is full is dropped rather than allowed to hold up the
+    others. Must be used from the event loop thread.
+    """
+
+    def __init__(self, max_queue: int) -> None:
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> "ChangeHub":
+        return cls(max_queue=int(os.getenv("SUBSCRIPTION_QUEUE_SIZE", "100")))
+
+    def subscribe(self, model: str, action: str) -> Subscriber:
+        subscriber = Subscriber(self, f"{model}:{action}", self.max_queue)
+        self._subscribers.setdefault(subscriber.topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.topic]
+
+    def publish(self, event: ChangeEvent) -> None:
+        self.published += 1
+        for subscriber in list(self._subscribers.get(event.topic, ())):
+            if not subscriber.offer(event):
+                self.unsubscribe(subscriber)
+                subscriber.drop()
+                self.dropped += 1
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class ChangeListener:
+    """Feeds the hub from Postgres NOTIFY over one LISTEN connection
+
+    The `row_changes` triggers publish every committed insert, update and
+    delete, including ones made by other workers, the importer or plain
+    SQL, as one notification per statement listing the ids it changed. The
+    connection is made with asyncpg directly, outside the pool, and is
+    re-established after `retry_interval` when it drops.
+    """
+
+    def __init__(
+        self,
+        hub: ChangeHub,
+        channel: str = CHANGES_CHANNEL,
+        keepalive: float = 30.0,
+        retry_interval: float = 5.0,
+    ) -> None:
+        self.hub = hub
+        self.channel = channel
+        self.keepalive = keepalive
+        self.retry_interval = retry_interval
+        self.connected = False
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return make_url(database.DATABASE_URL).get_backend_name() == "postgresql"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.enabled() and not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        # The trigger sends a batch of ids per statement; before migration
+        # e3b71f4c9a20 it sent one `id` per row
+        try:
+            data = json.loads(payload)
+            ids = data["ids"] if "ids" in data else [data["id"]]
+            events = [
+                ChangeEvent(model=data["model"], action=data["action"], id=int(id))
+                for id in ids
+            ]
+        except (ValueError, KeyError, TypeError):
+            return
+        for event in events:
+            self.hub.publish(event)
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        dsn = (
+            make_url(database.DATABASE_URL)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except Exception:
+                await asyncio.sleep(self.retry_interval)
+                continue
+
+            try:
+                await connection.add_listener(self.channel, self.on_notify)
+                self.connected = True
+                # A quiet connection can die unnoticed; ping it now and then
+                while not connection.is_closed():
+                    await asyncio.sleep(self.keepalive)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(self.retry_interval)
+            finally:
+                self.connected = False
+                if not connection.is_closed():
+                    connection.terminate()
+
+
+def publish_changes(model: str, action: str, ids: Iterable[int]) -> None:
+    """Publish writes made in this process, unless NOTIFY already delivers them"""
+    if change_listener.connected:
+        return
+    for id in ids:
+        change_hub.publish(ChangeEvent(model=model, action=action, id=id))
+
+
+change_hub = ChangeHub.from_env()
+change_listener = ChangeListener(change_hub)
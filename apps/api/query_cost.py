@@ -0,0 +1,260 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLField,
+    GraphQLObjectType,
+    GraphQLSchema,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+    get_operation_ast,
+    value_from_ast_untyped,
+)
+from graphql.execution import ExecutionResult as GraphQLExecutionResult
+from strawberry.extensions import SchemaExtension
+
+from .resolvers.pagination import clamp_page_size
+
+MAX_DEPTH = int(os.getenv("QUERY_MAX_DEPTH", "10"))
+MAX_ALIASES = int(os.getenv("QUERY_MAX_ALIASES", "15"))
+MAX_COST = int(os.getenv("QUERY_MAX_COST", "5000"))
+
+
+@dataclass(frozen=True)
+class FieldCost:
+    """Static cost of one field, attached with `metadata={"cost": FieldCost(...)}`
+
+    A field costs `cost` once per item of its enclosing lists. When one of
+    `size_args` is present the field returns that many items: a list
+    argument counts its length, a page size is clamped like the resolvers
+    clamp it, and everything selected below is multiplied by that size.
+    """
+
+    cost: int = 1
+    size_args: Tuple[str, ...] = ()
+
+
+# Unannotated root fields still resolve something; nested ones are free
+ROOT_FIELD_COST = FieldCost(cost=1)
+NESTED_FIELD_COST = FieldCost(cost=0)
+
+
+@dataclass
+class OperationCost:
+    cost: int = 0
+    depth: int = 0
+    aliases: int = 0
+
+
+def _field_cost(field: GraphQLField, is_root: bool) -> FieldCost:
+    definition = field.extensions.get("strawberry-definition")
+    metadata = getattr(definition, "metadata", None) or {}
+    if "cost" in metadata:
+        return metadata["cost"]
+    return ROOT_FIELD_COST if is_root else NESTED_FIELD_COST
+
+
+def _field_size(
+    field: GraphQLField,
+    node: FieldNode,
+    field_cost: FieldCost,
+    variables: Dict[str, Any],
+) -> int:
+    if not field_cost.size_args:
+        return 1
+
+    arguments = {
+        argument.name.value: argument.value for argument in node.arguments or ()
+    }
+    for name in field_cost.size_args:
+        if name in arguments:
+            value = value_from_ast_untyped(arguments[name], variables)
+        else:
+            value = field.args[name].default_value if name in field.args else None
+        if isinstance(value, list):
+            return len(value)
+        if isinstance(value, int):
+            return clamp_page_size(max(value, 0))
+    return clamp_page_size(None)
+
+
+class CostAnalyzer:
+    """Walks an operation and totals its cost, depth and alias count
+
+    Fragments are expanded in place. Introspection fields are skipped so
+    GraphiQL's schema query is never rejected.
+    """
+
+    def __init__(self, schema: GraphQLSchema, variables: Dict[str, Any]) -> None:
+        self.schema = schema
+        self.variables = variables
+        self.fragments: Dict[str, Any] = {}
+        self.result = OperationCost()
+
+    def analyze(self, document: Any, operation_name: Optional[str]) -> OperationCost:
+        operation = get_operation_ast(document, operation_name)
+        if operation is None:
+            return self.result
+
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if not isinstance(definition, OperationDefinitionNode)
+        }
+        self.variables = {
+            **{
+                definition.variable.name.value: value_from_ast_untyped(
+                    definition.default_value
+                )
+                for definition in operation.variable_definitions or ()
+                if definition.default_value is not None
+            },
+            **self.variables,
+        }
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is not None:
+            self._visit(operation.selection_set, root_type, 1, 1, set())
+        return self.result
+
+    def _visit(
+        self,
+        selection_set: SelectionSetNode,
+        parent_type: GraphQLObjectType,
+        depth: int,
+        multiplier: int,
+        visited_fragments: Set[str],
+    ) -> None:
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                self._visit_field(
+                    selection, parent_type, depth, multiplier, visited_fragments
+                )
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited_fragments:
+                    continue
+                visited_fragments = visited_fragments | {name}
+            else:
+                fragment = selection
+            fragment_type = parent_type
+            if getattr(fragment, "type_condition", None) is not None:
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+            if isinstance(fragment_type, GraphQLObjectType):
+                self._visit(
+                    fragment.selection_set,
+                    fragment_type,
+                    depth,
+                    multiplier,
+                    visited_fragments,
+                )
+
+    def _visit_field(
+        self,
+        node: FieldNode,
+        parent_type: GraphQLObjectType,
+        depth: int,
+        multiplier: int,
+        visited_fragments: Set[str],
+    ) -> None:
+        name = node.name.value
+        if name.startswith("__"):
+            return
+        field = parent_type.fields.get(name)
+        if field is None:
+            return
+
+        if node.alias is not None:
+            self.result.aliases += 1
+        self.result.depth = max(self.result.depth, depth)
+
+        field_cost = _field_cost(field, depth == 1)
+        size = _field_size(field, node, field_cost, self.variables)
+        self.result.cost += field_cost.cost * multiplier * max(size, 1)
+
+        field_type = get_named_type(field.type)
+        if node.selection_set is not None and isinstance(field_type, GraphQLObjectType):
+            self._visit(
+                node.selection_set,
+                field_type,
+                depth + 1,
+                multiplier * max(size, 1),
+                visited_fragments,
+            )
+
+
+class QueryCostLimiter(SchemaExtension):
+    """Rejects operations over the depth, alias or cost budget
+
+    The check runs right before execution rather than as a validation rule:
+    persisted documents skip validation once validated, and the cost of a
+    paginated field depends on the variables of each request. The computed
+    cost is reported under `extensions.cost` either way.
+    """
+
+    cost: Optional[OperationCost] = None
+
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        document = execution_context.graphql_document
+        if document is not None:
+            self.cost = CostAnalyzer(
+                execution_context.schema._schema, execution_context.variables or {}
+            ).analyze(document, execution_context.operation_name)
+
+            error = self._limit_error(self.cost)
+            if error is not None:
+                execution_context.result = GraphQLExecutionResult(
+                    data=None, errors=[error]
+                )
+        yield
+
+    def get_results(self) -> Dict[str, Any]:
+        if self.cost is None:
+            return {}
+        return {
+            "cost": {
+                "requested": self.cost.cost,
+                "maximum": MAX_COST,
+                "depth": self.cost.depth,
+                "aliases": self.cost.aliases,
+            }
+        }
+
+    @staticmethod
+    def _limit_error(cost: OperationCost) -> Optional[GraphQLError]:
+        if cost.depth > MAX_DEPTH:
+            return GraphQLError(
+                f"Query depth {cost.depth} exceeds the maximum of {MAX_DEPTH}",
+                extensions={
+                    "code": "QUERY_TOO_DEEP",
+                    "depth": cost.depth,
+                    "maxDepth": MAX_DEPTH,
+                },
+            )
+        if cost.aliases > MAX_ALIASES:
+            return GraphQLError(
+                f"Query uses {cost.aliases} aliases, the maximum is {MAX_ALIASES}",
+                extensions={
+                    "code": "TOO_MANY_ALIASES",
+                    "aliases": cost.aliases,
+                    "maxAliases": MAX_ALIASES,
+                },
+            )
+        if cost.cost > MAX_COST:
+            return GraphQLError(
+                f"Query cost {cost.cost} exceeds the maximum of {MAX_COST}",
+                extensions={
+                    "code": "QUERY_TOO_COMPLEX",
+                    "cost": cost.cost,
+                    "maxCost": MAX_COST,
+                },
+            )
+        return None
@@ -0,0 +1,332 @@
+"""Slow query log, sampled EXPLAIN plans and N+1 detection
+
+Off unless QUERY_PROFILER=1. Then every engine built in `database.py`
+reports its statements here:
+
+* statements slower than SLOW_QUERY_MS are logged with their parameters,
+  the GraphQL operation and the field path that ran them, and a sampled
+  share of them (QUERY_EXPLAIN_SAMPLE_RATE) gets an EXPLAIN plan;
+* a request that runs the same statement shape more than
+  N_PLUS_ONE_THRESHOLD times is flagged as a likely N+1.
+
+Entries live in a ring buffer of QUERY_LOG_SIZE, served at
+`/debug/queries`.
+"""
+
+import inspect
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from graphql import GraphQLResolveInfo
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from strawberry.extensions import SchemaExtension
+
+from .instrumentation import has_resolver
+from .metrics import RequestMetrics, current_metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_PROFILER = os.getenv("QUERY_PROFILER", "").lower() in ("1", "true", "yes")
+# Longest parameter repr kept per entry
+MAX_PARAMETERS_LENGTH = 1000
+EXPLAIN_SAVEPOINT = "query_profiler_explain"
+
+# Bind parameters as psycopg2 (%(name)s, %s), asyncpg ($1) and sqlite (?) render them
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+# `IN (?, ?, ?)` and multi-row `VALUES (?, ?), (?, ?)` of any length
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROW_LIST = re.compile(r"(\(\?(?:, \.\.\.)?\))(?:\s*,\s*\1)+")
+
+# The GraphQL field whose resolver is running, e.g. "notes" or "note"
+current_path: ContextVar[Optional[str]] = ContextVar("current_path", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with its parameters and list lengths abstracted away"""
+    shape = _PLACEHOLDER.sub("?", " ".join(statement.split()))
+    shape = _PLACEHOLDER_LIST.sub("?, ...", shape)
+    return _ROW_LIST.sub(r"\1, ...", shape)
+
+
+def _parameters(parameters: Any) -> str:
+    rendered = repr(parameters)
+    if len(rendered) > MAX_PARAMETERS_LENGTH:
+        rendered = rendered[:MAX_PARAMETERS_LENGTH] + "..."
+    return rendered
+
+
+def explain(connection: Any, statement: str, parameters: Any) -> Optional[str]:
+    """The plan for an already executed statement, on the same connection
+
+    SELECTs on Postgres get `EXPLAIN (ANALYZE, BUFFERS)`, which runs them
+    again; writes only get a plain `EXPLAIN` so they are never repeated.
+    The plan runs inside a savepoint so a failure cannot abort the
+    request's transaction. SQLite gets `EXPLAIN QUERY PLAN`.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        analyze = statement.lstrip()[:6].upper() == "SELECT"
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    savepoint = dialect == "postgresql"
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as exc:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return f"EXPLAIN failed: {exc}"
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+    # Postgres returns one line per row, SQLite the detail in the last column
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@dataclass
+class QueryLogEntry:
+    # "slow" or "n+1"
+    kind: str
+    statement: str
+    operation: Optional[str]
+    path: Optional[str]
+    # For "n+1", the total over every repeat so far
+    duration_ms: float
+    count: int = 1
+    parameters: Optional[str] = None
+    plan: Optional[str] = None
+    at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        entry = asdict(self)
+        entry["duration_ms"] = round(self.duration_ms, 3)
+        return entry
+
+
+class QueryProfiler:
+    """Keeps the most recent slow and repeated statements in a ring buffer"""
+
+    def __init__(
+        self,
+        slow_ms: float = 100.0,
+        explain_sample_rate: float = 0.1,
+        n_plus_one_threshold: int = 10,
+        size: int = 200,
+        sample: Callable[[], float] = random.random,
+    ) -> None:
+        self.slow_ms = slow_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.entries: Deque[QueryLogEntry] = deque(maxlen=size)
+        self.sample = sample
+        self.slow = 0
+        self.n_plus_one = 0
+        self.explained = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["QueryProfiler"]:
+        """Build the profiler from `QUERY_PROFILER` and its thresholds"""
+        if not QUERY_PROFILER:
+            return None
+        return cls(
+            slow_ms=float(os.getenv("SLOW_QUERY_MS", "100")),
+            explain_sample_rate=float(os.getenv("QUERY_EXPLAIN_SAMPLE_RATE", "0.1")),
+            n_plus_one_threshold=int(os.getenv("N_PLUS_ONE_THRESHOLD", "10")),
+            size=int(os.getenv("QUERY_LOG_SIZE", "200")),
+        )
+
+    def attach(self, engine: Engine) -> None:
+        """Profile `engine`; for an AsyncEngine pass its `sync_engine`"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        # Per execution context, so a statement that raises leaves nothing
+        # behind on the pooled connection
+        if context is not None:
+            context.profiler_started = time.perf_counter()
+
+    def _after_cursor_execute(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        started = getattr(context, "profiler_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics = current_metrics.get()
+        operation = metrics.operation if metrics is not None else None
+        path = current_path.get()
+
+        if metrics is not None:
+            self._count_shape(metrics, statement, elapsed_ms, operation, path)
+        if elapsed_ms < self.slow_ms:
+            return
+
+        plan = None
+        # Server-side cursors are still being read; leave their connection alone
+        streaming = context is not None and context.execution_options.get(
+            "stream_results"
+        )
+        if (
+            not executemany
+            and not streaming
+            and self.sample() < self.explain_sample_rate
+        ):
+            plan = explain(conn, statement, parameters)
+            self.explained += 1
+        self.slow += 1
+        self._record(
+            QueryLogEntry(
+                "slow",
+                statement,
+                operation,
+                path,
+                elapsed_ms,
+                parameters=_parameters(parameters),
+                plan=plan,
+            )
+        )
+        logger.warning(
+            "slow query %.1f ms in %s (%s): %s",
+            elapsed_ms,
+            operation,
+            path,
+            " ".join(statement.split()),
+        )
+
+    def _count_shape(
+        self,
+        metrics: RequestMetrics,
+        statement: str,
+        elapsed_ms: float,
+        operation: Optional[str],
+        path: Optional[str],
+    ) -> None:
+        shape = statement_shape(statement)
+        count, total_ms = metrics.statement_shapes.get(shape, (0, 0.0))
+        count, total_ms = count + 1, total_ms + elapsed_ms
+        metrics.statement_shapes[shape] = (count, total_ms)
+
+        entry = metrics.repeated_statements.get(shape)
+        if entry is not None:
+            # Already in the log; keep its totals current for the request
+            entry.count, entry.duration_ms = count, total_ms
+        elif count > self.n_plus_one_threshold:
+            entry = QueryLogEntry("n+1", shape, operation, path, total_ms, count=count)
+            metrics.repeated_statements[shape] = entry
+            self.n_plus_one += 1
+            self._record(entry)
+            logger.warning(
+                "likely N+1 in %s (%s): %d runs of %s", operation, path, count, shape
+            )
+
+    def _record(self, entry: QueryLogEntry) -> None:
+        with self._lock:
+            self.entries.append(entry)
+
+    def recent(
+        self, kind: Optional[str] = None, limit: int = 50
+    ) -> List[QueryLogEntry]:
+        """Newest first, optionally only one kind"""
+        with self._lock:
+            entries = list(self.entries)
+        entries.reverse()
+        if kind is not None:
+            entries = [entry for entry in entries if entry.kind == kind]
+        return entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slow_ms": self.slow_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "entries": len(self.entries),
+            "capacity": self.entries.maxlen,
+            "slow": self.slow,
+            "n_plus_one": self.n_plus_one,
+            "explained": self.explained,
+        }
+
+
+def field_path(info: GraphQLResolveInfo) -> str:
+    """The response path with list indexes folded, e.g. `notes.*.author`"""
+    return ".".join(
+        "*" if isinstance(key, int) else str(key) for key in info.path.as_list()
+    )
+
+
+class QueryProfilerExtension(SchemaExtension):
+    """Makes the field path of the running resolver visible to the profiler
+
+    Only installed while the profiler is on: Strawberry wraps every
+    field's resolution once an extension defines `resolve`.
+    """
+
+    def resolve(
+        self,
+        _next: Callable,
+        root: Any,
+        info: GraphQLResolveInfo,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        if not has_resolver(info):
+            return _next(root, info, *args, **kwargs)
+
+        path = field_path(info)
+        token = current_path.set(path)
+        try:
+            result = _next(root, info, *args, **kwargs)
+        finally:
+            current_path.reset(token)
+        if not inspect.isawaitable(result):
+            return result
+
+        async def traced() -> Any:
+            token = current_path.set(path)
+            try:
+                return await result
+            finally:
+                current_path.reset(token)
+
+        return traced()
+
+
+query_profiler: Optional[QueryProfiler] = QueryProfiler.from_env()
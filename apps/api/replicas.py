@@ -0,0 +1,308 @@
+"""Read replicas: round-robin routing, health and read-your-writes
+
+With DATABASE_REPLICA_URLS set, cacheable reads (`BaseSchemaGenerator`
+queries) go to the replicas and everything else stays on the primary.
+A replica is skipped while its last probe failed or lagged more than
+REPLICA_MAX_LAG_SECONDS, and for REPLICA_RETRY_SECONDS after a
+connection to it failed.
+
+A request that writes gets a read-after token: the write's time and,
+on Postgres, the primary's WAL position after it. The token goes back
+as an `X-Read-After` header and a `read_after` cookie. While a client
+presents an unexpired token, its reads only use a replica that has
+replayed past that position, so it sees its own writes. Without a
+position to compare, they stay on the primary for REPLICA_STICKY_SECONDS.
+"""
+
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Any, Callable, Dict, List, Optional
+
+READ_AFTER_HEADER = "x-read-after"
+READ_AFTER_COOKIE = "read_after"
+
+
+def replica_urls() -> List[str]:
+    urls = [
+        url.strip()
+        for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+    return [
+        (
+            url.replace("postgres://", "postgresql://", 1)
+            if url.startswith("postgres://")
+            else url
+        )
+        for url in urls
+    ]
+
+
+def parse_lsn(value: str) -> int:
+    """A Postgres LSN such as `16/B374D848` as one comparable integer"""
+    high, low = value.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+@dataclass(frozen=True)
+class ReadAfter:
+    """Where a client's last write landed"""
+
+    written_at: float
+    # The primary's WAL position after the write, where there is one
+    lsn: Optional[int] = None
+
+    def encode(self) -> str:
+        encoded = f"{self.written_at:.3f}"
+        return encoded if self.lsn is None else f"{encoded}:{self.lsn}"
+
+    @classmethod
+    def decode(cls, value: str, now: Optional[float] = None) -> Optional["ReadAfter"]:
+        """The token a client sent back, or None if it is not one
+
+        Tokens are not signed. A write time later than `now` (the current
+        time by default) is clamped to it, so a forged or skewed token pins
+        the client to the primary for at most REPLICA_STICKY_SECONDS.
+        """
+        written_at, _, lsn = value.partition(":")
+        try:
+            written = float(written_at)
+            position = int(lsn) if lsn else None
+        except ValueError:
+            return None
+        if not math.isfinite(written):
+            return None
+        return cls(min(written, time.time() if now is None else now), position)
+
+    def merge(self, other: Optional["ReadAfter"]) -> "ReadAfter":
+        """The token that covers both writes"""
+        if other is None:
+            return self
+        lsns = [lsn for lsn in (self.lsn, other.lsn) if lsn is not None]
+        return ReadAfter(
+            max(self.written_at, other.written_at), max(lsns) if lsns else None
+        )
+
+
+class RequestConsistency:
+    """What the current request must be able to read"""
+
+    def __init__(self, read_after: Optional[ReadAfter] = None) -> None:
+        self.read_after = read_after
+        # Set when this request wrote, to hand a new token to the client
+        self.wrote: Optional[ReadAfter] = None
+
+
+current_consistency: ContextVar[Optional[RequestConsistency]] = ContextVar(
+    "current_consistency", default=None
+)
+
+
+@dataclass
+class ReplicaState:
+    name: str
+    healthy: bool = True
+    failed_at: Optional[float] = None
+    replay_lsn: Optional[int] = None
+    lag_seconds: Optional[float] = None
+    checked_at: Optional[float] = None
+    reads: int = 0
+
+
+class ReplicaRouter:
+    """Picks the replica for each read, or None for the primary"""
+
+    def __init__(
+        self,
+        names: List[str],
+        max_lag_seconds: float = 10.0,
+        sticky_seconds: float = 10.0,
+        retry_seconds: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.states = [ReplicaState(name) for name in names]
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.primary_reads = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ReplicaRouter"]:
+        """Build the router from DATABASE_REPLICA_URLS; None without replicas"""
+        urls = replica_urls()
+        if not urls:
+            return None
+        return cls(
+            [_display_name(url) for url in urls],
+            max_lag_seconds=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10")),
+            sticky_seconds=float(os.getenv("REPLICA_STICKY_SECONDS", "10")),
+            retry_seconds=float(os.getenv("REPLICA_RETRY_SECONDS", "30")),
+        )
+
+    def read_after(self) -> Optional[ReadAfter]:
+        """The current request's unexpired read-after token, if any"""
+        consistency = current_consistency.get()
+        if consistency is None:
+            return None
+        token = consistency.read_after
+        if consistency.wrote is not None:
+            token = consistency.wrote.merge(token)
+        if token is None or self.clock() - token.written_at >= self.sticky_seconds:
+            return None
+        return token
+
+    def choose(self) -> Optional[int]:
+        token = self.read_after()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.states)
+        for offset in range(len(self.states)):
+            index = (start + offset) % len(self.states)
+            state = self.states[index]
+            if self._usable(state) and self._caught_up(state, token):
+                state.reads += 1
+                return index
+        self.primary_reads += 1
+        return None
+
+    def _usable(self, state: ReplicaState) -> bool:
+        if state.healthy:
+            return True
+        # Give failed replicas another chance even when nothing probes them
+        return (
+            state.failed_at is not None
+            and self.clock() - state.failed_at >= self.retry_seconds
+        )
+
+    @staticmethod
+    def _caught_up(state: ReplicaState, token: Optional[ReadAfter]) -> bool:
+        if token is None:
+            return True
+        if token.lsn is None or state.replay_lsn is None:
+            return False
+        return state.replay_lsn >= token.lsn
+
+    def mark_failed(self, index: int) -> None:
+        state = self.states[index]
+        state.healthy = False
+        state.failed_at = self.clock()
+
+    def record_probe(
+        self,
+        index: int,
+        ok: bool,
+        replay_lsn: Optional[int] = None,
+        lag_seconds: Optional[float] = None,
+    ) -> None:
+        state = self.states[index]
+        state.checked_at = self.clock()
+        state.replay_lsn = replay_lsn
+        state.lag_seconds = lag_seconds
+        lagging = lag_seconds is not None and lag_seconds > self.max_lag_seconds
+        if ok and not lagging:
+            state.healthy = True
+            state.failed_at = None
+        else:
+            self.mark_failed(index)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {
+                    "name": state.name,
+                    "healthy": state.healthy,
+                    "lag_seconds": state.lag_seconds,
+                    "reads": state.reads,
+                }
+                for state in self.states
+            ],
+        }
+
+
+def _display_name(url: str) -> str:
+    # Imported here: the app installs ConsistencyMiddleware before SQLAlchemy
+    # is otherwise needed
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    return parsed.set(password=None).render_as_string(hide_password=True)
+
+
+def record_write(lsn: Optional[int]) -> None:
+    """Pin the rest of this request, and the client's next ones, to the write"""
+    consistency = current_consistency.get()
+    if consistency is not None:
+        consistency.wrote = ReadAfter(time.time(), lsn).merge(consistency.wrote)
+
+
+def must_read_own_writes() -> bool:
+    """Whether the current request still has to see a recent write
+
+    Such reads skip the query cache, which a lagging replica may have
+    filled with rows older than the write.
+    """
+    return replica_router is not None and replica_router.read_after() is not None
+
+
+class ConsistencyMiddleware:
+    """Carries read-after tokens between clients and the router (pure ASGI)"""
+
+    def __init__(self, app: Callable, sticky_seconds: float) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consistency = RequestConsistency(_read_after_from(scope["headers"]))
+        token = current_consistency.set(consistency)
+
+        async def send_with_token(message: Dict[str, Any]) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and consistency.wrote is not None
+            ):
+                value = consistency.wrote.merge(consistency.read_after).encode()
+                cookie = (
+                    f"{READ_AFTER_COOKIE}={value}; Max-Age={int(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((READ_AFTER_HEADER.encode(), value.encode()))
+                headers.append((b"set-cookie", cookie.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            current_consistency.reset(token)
+
+
+def _read_after_from(headers: List[Any]) -> Optional[ReadAfter]:
+    for name, value in headers:
+        if name == READ_AFTER_HEADER.encode():
+            return ReadAfter.decode(value.decode("latin-1"))
+    for name, value in headers:
+        if name == b"cookie":
+            cookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+            if READ_AFTER_COOKIE in cookie:
+                return ReadAfter.decode(cookie[READ_AFTER_COOKIE].value)
+    return None
+
+
+replica_router: Optional[ReplicaRouter] = ReplicaRouter.from_env()
@@ -0,0 +1,176 @@
+"""Runs blocking sync resolvers on a bounded thread pool
+
+In sync mode `BaseSchemaGenerator` calls do psycopg2 I/O. Run on the
+event loop, one slow query would stall every request in the worker, so
+they run on a thread pool with as many threads as the engine's pool
+holds connections (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW, or
+RESOLVER_THREADS; 0 runs them on the loop as before).
+
+Callers first reserve a slot, one per thread. A GraphQL operation holds
+its slot from its first call until its unit of work ends, so operations
+that already hold a connection never wait behind ones that are queued
+for one. Its fields queue for that one thread (`UnitOfWork.run`) rather
+than taking more. Waiting longer than RESOLVER_QUEUE_TIMEOUT for a slot fails the
+call instead of piling up requests the database cannot serve.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import ArgumentError
+
+from .database import (
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_TIMEOUT,
+    is_async_mode,
+)
+
+
+def _is_postgres(url: str) -> bool:
+    try:
+        # Vercel hands out postgres:// URLs
+        return make_url(url).get_backend_name() in ("postgres", "postgresql")
+    except ArgumentError:
+        return False
+
+
+class ResolverQueueTimeout(Exception):
+    """No resolver thread became free in time"""
+
+
+class ResolverExecutor:
+    """A thread pool for sync resolvers with a bounded, timed queue"""
+
+    def __init__(self, workers: int, queue_timeout: Optional[float] = 30.0) -> None:
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="resolver"
+        )
+        # One semaphore per event loop; asyncio primitives are loop-bound
+        self._gates: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.waiting = 0
+        self.busy = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_ms = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResolverExecutor"]:
+        """Size the pool from RESOLVER_THREADS or the database pool settings
+
+        None in async mode, where resolvers never block, and when
+        RESOLVER_THREADS=0. Unless RESOLVER_THREADS asks for threads, SQLite
+        stand-ins also run on the loop: their queries wait on the GIL, not
+        the network, so threads only add contention.
+        """
+        if is_async_mode():
+            return None
+        configured = os.getenv("RESOLVER_THREADS", "")
+        if configured:
+            workers = int(configured)
+        elif not _is_postgres(os.getenv("POSTGRES_URL_NON_POOLING", "")):
+            return None
+        else:
+            # A negative max_overflow means an unbounded pool; cap at its size
+            workers = max(DATABASE_POOL_SIZE, 1) + max(DATABASE_MAX_OVERFLOW, 0)
+        if workers <= 0:
+            return None
+        timeout = float(os.getenv("RESOLVER_QUEUE_TIMEOUT", str(DATABASE_POOL_TIMEOUT)))
+        return cls(workers, queue_timeout=timeout if timeout > 0 else None)
+
+    def _gate(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        gate = self._gates.get(loop)
+        if gate is None:
+            gate = self._gates[loop] = asyncio.Semaphore(self.workers)
+        return gate
+
+    def _count(self, **changes: float) -> None:
+        with self._lock:
+            for name, change in changes.items():
+                setattr(self, name, getattr(self, name) + change)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Reserve one thread for the caller, waiting at most `queue_timeout`"""
+        gate = self._gate()
+        started = time.perf_counter()
+        self._count(waiting=1)
+        try:
+            await asyncio.wait_for(gate.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._count(timeouts=1)
+            raise ResolverQueueTimeout(
+                f"no database worker free after {self.queue_timeout:g}s"
+            ) from None
+        finally:
+            self._count(waiting=-1, wait_ms=(time.perf_counter() - started) * 1000)
+        self._count(busy=1, acquired=1)
+        try:
+            yield
+        finally:
+            self._count(busy=-1)
+            gate.release()
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call `func` on a pool thread with the caller's context variables"""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(context.run, func, *args, **kwargs)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "wait_ms": round(self.wait_ms, 3),
+        }
+
+    def render(self) -> str:
+        """Slot use and queue depth as Prometheus metrics"""
+        lines = []
+        for name, kind, help_text, value in (
+            ("api_resolver_threads", "gauge", "Resolver threads", self.workers),
+            ("api_resolver_busy", "gauge", "Resolver slots in use", self.busy),
+            (
+                "api_resolver_queue_depth",
+                "gauge",
+                "Calls waiting for a resolver slot",
+                self.waiting,
+            ),
+            (
+                "api_resolver_queue_wait_seconds_total",
+                "counter",
+                "Time spent waiting for a resolver slot",
+                repr(self.wait_ms / 1000),
+            ),
+            (
+                "api_resolver_queue_timeouts_total",
+                "counter",
+                "Calls that gave up waiting for a resolver slot",
+                self.timeouts,
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines.append(f"{name} {value}")
+        return "".join(line + "\n" for line in lines)
+
+
+resolver_executor: Optional[ResolverExecutor] = ResolverExecutor.from_env()
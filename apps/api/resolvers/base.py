@@ -1,57 +1,884 @@
-from typing import Generic, List, Optional, Type, TypeVar
+import io
+import operator
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    any_,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+)
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 
-from ..models.base import BaseModel
+from ..models.base import BaseModel, utcnow
+from ..unit_of_work import DEFER_COMMIT
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    Page,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+)
+from .search import SearchHit, postgres_search, sqlite_search
+from .sync import (
+    ChangeSet,
+    decode_watermark,
+    encode_watermark,
+    horizon_statement,
+    needs_resync,
+    purge_cutoff,
+    sync_horizon,
+)
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
+# Upper bound on rows per bulk mutation; larger ingests should chunk
+MAX_BULK_SIZE = 1000
+# Rows fetched per server-side cursor round trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+
+def _copy_csv_value(value: Any) -> str:
+    """Encode one value for `COPY ... WITH (FORMAT csv)`
+
+    Strings are always quoted so an empty string stays distinct from NULL,
+    which COPY reads from an unquoted empty field.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _like_prefix(value: str) -> str:
+    """A single bound LIKE pattern, so Postgres can turn it into an index range"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+# `<column>_<suffix>` filter keys; a bare `<column>` key tests equality
+FILTER_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "prefix": lambda column, value: column.like(_like_prefix(value), escape="\\"),
+}
+
 
 class BaseResolver(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """Generic CRUD over `model`
+
+    Every operation has a sync variant taking a `Session` and an `_async`
+    variant taking an `AsyncSession`; both run the same statements. Reads
+    accept `columns` to load only those attributes (plus the keyset columns);
+    everything else stays deferred. Writes are single statements that return
+    `Row`s straight from `RETURNING` rather than ORM objects. Deletes only
+    set `deleted_at`; such tombstones are invisible to everything but
+    `get_changes`.
+    """
+
     model: Type[ModelType]
+    # Columns that make up the keyset; the last one must be unique
+    cursor_columns: Tuple[str, ...] = ("id",)
+    # Text columns covered by full-text search, in snippet order
+    search_columns: Tuple[str, ...] = ()
+
+    @classmethod
+    def get_all(
+        cls,
+        db: Session,
+        limit: int = DEFAULT_PAGE_SIZE,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> List[ModelType]:
+        """Up to `limit` rows matching `filters`, sorted by `order_by`
+
+        `filters` maps `<column>` to an equality test and
+        `<column>_<op>` to a comparison, with `op` one of FILTER_OPERATORS.
+        `order_by` is a sequence of `(column, "asc" | "desc")`; ties are
+        broken by id in the direction of the last key.
+        """
+        statement = cls._all_statement(limit, columns, filters, order_by)
+        return list(db.execute(statement).scalars())
+
+    @classmethod
+    async def get_all_async(
+        cls,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> List[ModelType]:
+        statement = cls._all_statement(limit, columns, filters, order_by)
+        return list((await db.execute(statement)).scalars())
+
+    @classmethod
+    def get_page(
+        cls,
+        db: Session,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[ModelType]:
+        """Fetch one keyset page: `WHERE key > cursor ORDER BY key LIMIT n`"""
+        statement, size = cls._page_statement(first, after, last, before, columns)
+        rows = list(db.execute(statement).scalars())
+        return cls._build_page(rows, size, last is not None, after, before)
 
     @classmethod
-    def get_all(cls, db: Session) -> List[ModelType]:
-        return db.query(cls.model).all()
+    async def get_page_async(
+        cls,
+        db: AsyncSession,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[ModelType]:
+        statement, size = cls._page_statement(first, after, last, before, columns)
+        rows = list((await db.execute(statement)).scalars())
+        return cls._build_page(rows, size, last is not None, after, before)
+
+    @classmethod
+    def search(
+        cls,
+        db: Session,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[SearchHit[ModelType]]:
+        """Full-text search, best match first, keyset-paginated on (rank, id)"""
+        if not query.strip():
+            return Page(items=[], has_next_page=False, has_previous_page=False)
+        statement, size = cls._search_statement(db, query, first, after, columns)
+        rows = db.execute(statement).all()
+        return cls._build_page(cls._search_hits(rows), size, False, after, None)
+
+    @classmethod
+    async def search_async(
+        cls,
+        db: AsyncSession,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page[SearchHit[ModelType]]:
+        if not query.strip():
+            return Page(items=[], has_next_page=False, has_previous_page=False)
+        statement, size = cls._search_statement(db, query, first, after, columns)
+        rows = (await db.execute(statement)).all()
+        return cls._build_page(cls._search_hits(rows), size, False, after, None)
+
+    @classmethod
+    def get_changes(
+        cls,
+        db: Session,
+        since: Optional[str] = None,
+        first: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> ChangeSet[ModelType]:
+        """Rows written after the `since` watermark, oldest first
+
+        One range scan over `(updated_at, id)`: updates and deletes both bump
+        `updated_at`, so a sync reads only what changed since the last one.
+        Without `since` every live row is returned; the client has nothing
+        to delete yet. The same goes for a `since` older than
+        TOMBSTONE_RETENTION, whose deletes may be purged; the result is
+        flagged `reset`. The watermark never passes `sync_horizon`, so rows
+        that commit late are still picked up by the next sync.
+        """
+        # Fixed before the scan: a write committing during it started earlier
+        now, oldest, complete = db.execute(cls._horizon_statement(db)).one()
+        reset = needs_resync(since, now)
+        since = None if reset else since
+        statement, size = cls._changes_statement(since, first, columns)
+        rows = list(db.execute(statement).scalars())
+        return cls._build_changes(
+            rows, size, since, sync_horizon(oldest, complete), reset
+        )
+
+    @classmethod
+    async def get_changes_async(
+        cls,
+        db: AsyncSession,
+        since: Optional[str] = None,
+        first: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> ChangeSet[ModelType]:
+        result = await db.execute(cls._horizon_statement(db))
+        now, oldest, complete = result.one()
+        reset = needs_resync(since, now)
+        since = None if reset else since
+        statement, size = cls._changes_statement(since, first, columns)
+        rows = list((await db.execute(statement)).scalars())
+        return cls._build_changes(
+            rows, size, since, sync_horizon(oldest, complete), reset
+        )
+
+    @classmethod
+    def purge_tombstones(cls, db: Session, batch_size: int = MAX_BULK_SIZE) -> int:
+        """Hard-delete tombstones older than TOMBSTONE_RETENTION
+
+        Runs in batches of `batch_size`, each committed on its own so no
+        lock is held for long. Syncs from before the cutoff get a full
+        resync instead of the purged deletes. Returns the rows removed.
+        """
+        cutoff = purge_cutoff(db.execute(select(utcnow())).scalar_one())
+        purged = 0
+        while cutoff is not None:
+            count = db.execute(cls._purge_statement(cutoff, batch_size)).rowcount
+            db.commit()
+            purged += count
+            if count < batch_size:
+                break
+        return purged
+
+    @classmethod
+    async def purge_tombstones_async(
+        cls, db: AsyncSession, batch_size: int = MAX_BULK_SIZE
+    ) -> int:
+        cutoff = purge_cutoff((await db.execute(select(utcnow()))).scalar_one())
+        purged = 0
+        while cutoff is not None:
+            result = await db.execute(cls._purge_statement(cutoff, batch_size))
+            await db.commit()
+            purged += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        return purged
+
+    @classmethod
+    def stream(
+        cls,
+        db: Session,
+        columns: Sequence[str],
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[Sequence[Row]]:
+        """Every row as plain tuples of `columns`, `batch_size` rows at a time
+
+        Uses a server-side cursor (`yield_per` implies `stream_results`), so
+        only one batch is ever held in memory whatever the table size.
+        """
+        statement = cls._export_statement(columns).execution_options(
+            yield_per=batch_size
+        )
+        yield from db.execute(statement).partitions()
 
     @classmethod
-    def get_by_id(cls, db: Session, id: int) -> Optional[ModelType]:
-        return db.query(cls.model).filter(cls.model.id == id).first()
+    async def stream_async(
+        cls,
+        db: AsyncSession,
+        columns: Sequence[str],
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Sequence[Row]]:
+        statement = cls._export_statement(columns).execution_options(
+            yield_per=batch_size
+        )
+        result = await db.stream(statement)
+        async for partition in result.partitions():
+            yield partition
 
     @classmethod
-    def create(cls, db: Session, obj_in: CreateSchemaType) -> ModelType:
-        obj_data = obj_in.__dict__
-        db_obj = cls.model(**obj_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    def search_cursor_for(cls, hit: SearchHit[ModelType]) -> str:
+        return encode_cursor([hit.rank, hit.item.id])
 
     @classmethod
-    def update(
-        cls, db: Session, id: int, obj_in: UpdateSchemaType
+    def cursor_for(cls, db_obj: ModelType) -> str:
+        return encode_cursor([getattr(db_obj, name) for name in cls.cursor_columns])
+
+    @classmethod
+    def get_by_id(
+        cls, db: Session, id: int, columns: Optional[Sequence[str]] = None
     ) -> Optional[ModelType]:
-        db_obj = cls.get_by_id(db, id)
-        if not db_obj:
-            return None
+        return db.execute(cls._by_id_statement(id, columns)).scalars().first()
 
-        obj_data = obj_in.__dict__
-        for field, value in obj_data.items():
-            if value is not None:
-                setattr(db_obj, field, value)
+    @classmethod
+    async def get_by_id_async(
+        cls, db: AsyncSession, id: int, columns: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        return (await db.execute(cls._by_id_statement(id, columns))).scalars().first()
 
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    @classmethod
+    def get_by_ids(
+        cls, db: Session, ids: Sequence[int], columns: Optional[Sequence[str]] = None
+    ) -> List[Optional[ModelType]]:
+        """Load many rows in one query, returned in the order of `ids`"""
+        rows = db.execute(cls._by_ids_statement(db, ids, columns)).scalars()
+        return cls._in_order(rows, ids)
+
+    @classmethod
+    async def get_by_ids_async(
+        cls,
+        db: AsyncSession,
+        ids: Sequence[int],
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Optional[ModelType]]:
+        rows = (await db.execute(cls._by_ids_statement(db, ids, columns))).scalars()
+        return cls._in_order(rows, ids)
+
+    @classmethod
+    def create(cls, db: Session, obj_in: CreateSchemaType) -> Row:
+        """Insert with `INSERT ... RETURNING`; no follow-up refresh SELECT"""
+        row = db.execute(cls._insert_statement(obj_in)).one()
+        cls._commit(db)
+        return row
+
+    @classmethod
+    async def create_async(cls, db: AsyncSession, obj_in: CreateSchemaType) -> Row:
+        row = (await db.execute(cls._insert_statement(obj_in))).one()
+        await cls._commit_async(db)
+        return row
+
+    @classmethod
+    def update(cls, db: Session, id: int, obj_in: UpdateSchemaType) -> Optional[Row]:
+        """Update with `UPDATE ... RETURNING`; no row back means not found"""
+        row = db.execute(cls._update_one_statement(id, obj_in)).first()
+        cls._commit(db)
+        return row
+
+    @classmethod
+    async def update_async(
+        cls, db: AsyncSession, id: int, obj_in: UpdateSchemaType
+    ) -> Optional[Row]:
+        row = (await db.execute(cls._update_one_statement(id, obj_in))).first()
+        await cls._commit_async(db)
+        return row
 
     @classmethod
     def delete(cls, db: Session, id: int) -> bool:
-        db_obj = cls.get_by_id(db, id)
-        if not db_obj:
-            return False
+        """Soft delete: the row stays behind as a tombstone for syncing clients"""
+        result = db.execute(cls._delete_one_statement(id))
+        cls._commit(db)
+        return result.rowcount > 0
+
+    @classmethod
+    async def delete_async(cls, db: AsyncSession, id: int) -> bool:
+        result = await db.execute(cls._delete_one_statement(id))
+        await cls._commit_async(db)
+        return result.rowcount > 0
+
+    @classmethod
+    def bulk_create(cls, db: Session, objs_in: Sequence[CreateSchemaType]) -> List[Row]:
+        """Insert all rows with one multi-row `INSERT ... RETURNING`"""
+        cls._check_bulk_size(objs_in)
+        if not objs_in:
+            return []
+        statement, params = cls._bulk_insert_statement(objs_in)
+        rows = list(db.execute(statement, params))
+        cls._commit(db)
+        return rows
+
+    @classmethod
+    async def bulk_create_async(
+        cls, db: AsyncSession, objs_in: Sequence[CreateSchemaType]
+    ) -> List[Row]:
+        cls._check_bulk_size(objs_in)
+        if not objs_in:
+            return []
+        statement, params = cls._bulk_insert_statement(objs_in)
+        rows = list(await db.execute(statement, params))
+        await cls._commit_async(db)
+        return rows
+
+    @classmethod
+    def bulk_copy(
+        cls, db: Session, columns: Sequence[str], rows: Sequence[Sequence[Any]]
+    ) -> int:
+        """Load already-validated `rows` of `columns` and commit
+
+        On Postgres this is `COPY ... FROM STDIN`, which skips per-row
+        statement overhead entirely; columns left out (timestamps) take
+        their server defaults. Other dialects fall back to an executemany
+        INSERT. Unlike `bulk_create` nothing is returned and there is no
+        `MAX_BULK_SIZE` cap; callers chunk the input themselves.
+        """
+        if not rows:
+            return 0
+        if cls._is_postgres(db):
+            buffer = io.StringIO(
+                "".join(",".join(map(_copy_csv_value, row)) + "\n" for row in rows)
+            )
+            raw = db.connection().connection.driver_connection
+            with raw.cursor() as cursor:
+                cursor.copy_expert(cls._copy_sql(columns), buffer)
+        else:
+            db.execute(
+                insert(cls.model.__table__),
+                [dict(zip(columns, row)) for row in rows],
+            )
+        cls._commit(db)
+        return len(rows)
+
+    @classmethod
+    async def bulk_copy_async(
+        cls, db: AsyncSession, columns: Sequence[str], rows: Sequence[Sequence[Any]]
+    ) -> int:
+        if not rows:
+            return 0
+        if cls._is_postgres(db):
+            connection = await db.connection()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                cls.model.__tablename__, records=rows, columns=list(columns)
+            )
+        else:
+            await db.execute(
+                insert(cls.model.__table__),
+                [dict(zip(columns, row)) for row in rows],
+            )
+        await cls._commit_async(db)
+        return len(rows)
+
+    @classmethod
+    def bulk_update(
+        cls, db: Session, items: Sequence[Tuple[int, UpdateSchemaType]]
+    ) -> List[Optional[Row]]:
+        """Apply many partial updates in one transaction
+
+        On Postgres this is a single `UPDATE ... FROM (VALUES ...) RETURNING`.
+        Results line up with `items`; ids that don't exist give None.
+        """
+        cls._check_bulk_size(items)
+        rows = []
+        for statement in cls._bulk_update_statements(db, items):
+            rows.extend(db.execute(statement))
+        cls._commit(db)
+        return cls._in_order(rows, [id for id, _ in items])
+
+    @classmethod
+    async def bulk_update_async(
+        cls, db: AsyncSession, items: Sequence[Tuple[int, UpdateSchemaType]]
+    ) -> List[Optional[Row]]:
+        cls._check_bulk_size(items)
+        rows = []
+        for statement in cls._bulk_update_statements(db, items):
+            rows.extend(await db.execute(statement))
+        await cls._commit_async(db)
+        return cls._in_order(rows, [id for id, _ in items])
+
+    @classmethod
+    def bulk_delete(cls, db: Session, ids: Sequence[int]) -> List[bool]:
+        """Tombstone with one `UPDATE ... WHERE id = ANY(:ids) RETURNING id`
 
-        db.delete(db_obj)
-        db.commit()
-        return True
+        Returns, per id, whether a row was deleted.
+        """
+        cls._check_bulk_size(ids)
+        deleted = set(db.execute(cls._bulk_delete_statement(db, ids)).scalars())
+        cls._commit(db)
+        return [id in deleted for id in ids]
+
+    @classmethod
+    async def bulk_delete_async(
+        cls, db: AsyncSession, ids: Sequence[int]
+    ) -> List[bool]:
+        cls._check_bulk_size(ids)
+        result = await db.execute(cls._bulk_delete_statement(db, ids))
+        deleted = set(result.scalars())
+        await cls._commit_async(db)
+        return [id in deleted for id in ids]
+
+    @classmethod
+    def _copy_sql(cls, columns: Sequence[str]) -> str:
+        names = ", ".join(cls._column(name).name for name in columns)
+        return f"COPY {cls.model.__tablename__} ({names}) FROM STDIN WITH (FORMAT csv)"
+
+    @classmethod
+    def _export_statement(cls, columns: Sequence[str]) -> Select:
+        return (
+            select(*[cls._column(name) for name in columns])
+            .where(cls._live())
+            .order_by(*cls._cursor_keys())
+        )
+
+    @classmethod
+    def _live(cls):
+        return cls.model.__table__.c.deleted_at.is_(None)
+
+    @classmethod
+    def _select(
+        cls, columns: Optional[Sequence[str]] = None, tombstones: bool = False
+    ) -> Select:
+        statement = select(cls.model)
+        if not tombstones:
+            statement = statement.where(cls._live())
+        if columns is None:
+            return statement
+
+        mapped = sa_inspect(cls.model).column_attrs.keys()
+        names = dict.fromkeys(
+            [*cls.cursor_columns, *[name for name in columns if name in mapped]]
+        )
+        return statement.options(
+            load_only(*[getattr(cls.model, name) for name in names])
+        )
+
+    @classmethod
+    def _all_statement(
+        cls,
+        limit: int,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> Select:
+        return (
+            cls._select(columns)
+            .where(*cls._filter_clauses(filters or {}))
+            .order_by(*cls._order_clauses(order_by or ()))
+            .limit(clamp_page_size(limit))
+        )
+
+    @classmethod
+    def _column(cls, name: str):
+        column = cls.model.__table__.c.get(name)
+        if column is None:
+            raise ValueError(f"Unknown {cls.model.__name__} column: {name}")
+        return column
+
+    @classmethod
+    def _filter_clauses(cls, filters: Dict[str, Any]) -> list:
+        clauses = []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            name, _, op = key.rpartition("_")
+            if op in FILTER_OPERATORS and name in cls.model.__table__.c:
+                clauses.append(FILTER_OPERATORS[op](cls._column(name), value))
+            else:
+                clauses.append(cls._column(key) == value)
+        return clauses
+
+    @classmethod
+    def _order_clauses(cls, order_by: Sequence[Tuple[str, str]]) -> list:
+        """ORDER BY for `order_by`, made total with the keyset columns"""
+        clauses = []
+        descending = False
+        for name, direction in order_by:
+            if direction not in ("asc", "desc"):
+                raise ValueError(f"Unknown sort direction: {direction}")
+            descending = direction == "desc"
+            column = cls._column(name)
+            clauses.append(column.desc() if descending else column.asc())
+
+        # Tie-break in the same direction so one composite index serves the scan
+        sorted_names = {name for name, _ in order_by}
+        for key in cls._cursor_keys():
+            if key.key not in sorted_names:
+                clauses.append(key.desc() if descending else key.asc())
+        return clauses
+
+    @classmethod
+    def _by_id_statement(
+        cls, id: int, columns: Optional[Sequence[str]] = None
+    ) -> Select:
+        return cls._select(columns).where(cls.model.id == id)
+
+    @classmethod
+    def _by_ids_statement(
+        cls, db, ids: Sequence[int], columns: Optional[Sequence[str]] = None
+    ) -> Select:
+        return cls._select(columns).where(cls._id_in(db, cls.model.id, ids))
+
+    @classmethod
+    def _id_in(cls, db, id_column, ids: Sequence[int]):
+        if cls._is_postgres(db):
+            # Imported here so the dialect loads with the engine, not the app
+            from sqlalchemy.dialects.postgresql import ARRAY
+
+            # One array parameter keeps a single statement shape for any batch
+            ids_param = bindparam("ids", list(ids), type_=ARRAY(id_column.type))
+            return id_column == any_(ids_param)
+        return id_column.in_(list(ids))
+
+    @staticmethod
+    def _commit(db: Session) -> None:
+        """Commit, unless the operation's unit of work commits at its end"""
+        if db.info.get(DEFER_COMMIT) is True:
+            db.flush()
+        else:
+            db.commit()
+
+    @staticmethod
+    async def _commit_async(db: AsyncSession) -> None:
+        if db.info.get(DEFER_COMMIT) is True:
+            await db.flush()
+        else:
+            await db.commit()
+
+    @staticmethod
+    def _is_postgres(db) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def _check_bulk_size(items: Sequence[Any]) -> None:
+        if len(items) > MAX_BULK_SIZE:
+            raise ValueError(
+                f"Bulk operations accept at most {MAX_BULK_SIZE} items, "
+                f"got {len(items)}"
+            )
+
+    @classmethod
+    def _bulk_insert_statement(cls, objs_in: Sequence[CreateSchemaType]):
+        table = cls.model.__table__
+        # insertmanyvalues turns this executemany into multi-row INSERTs
+        statement = insert(table).returning(*table.c, sort_by_parameter_order=True)
+        return statement, [dict(obj_in.__dict__) for obj_in in objs_in]
+
+    @classmethod
+    def _bulk_update_statements(
+        cls, db, items: Sequence[Tuple[int, UpdateSchemaType]]
+    ) -> list:
+        table = cls.model.__table__
+        ids = [id for id, _ in items]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Bulk updates must not repeat an id")
+        if not items:
+            return []
+
+        if not cls._is_postgres(db):
+            return [cls._update_one_statement(id, obj_in) for id, obj_in in items]
+
+        # None means "leave unchanged", as in `update`
+        names = list(items[0][1].__dict__)
+        rows = values(
+            column("id", Integer),
+            *[column(name, table.c[name].type) for name in names],
+            name="changes",
+        ).data([(id, *[obj_in.__dict__[n] for n in names]) for id, obj_in in items])
+        return [
+            update(table)
+            .where(table.c.id == rows.c.id, cls._live())
+            .values(
+                {
+                    name: func.coalesce(
+                        cast(rows.c[name], table.c[name].type), table.c[name]
+                    )
+                    for name in names
+                }
+            )
+            .returning(*table.c)
+        ]
+
+    @classmethod
+    def _insert_statement(cls, obj_in: CreateSchemaType):
+        table = cls.model.__table__
+        return insert(table).values(dict(obj_in.__dict__)).returning(*table.c)
+
+    @classmethod
+    def _update_one_statement(cls, id: int, obj_in: UpdateSchemaType):
+        table = cls.model.__table__
+        changes = {k: v for k, v in obj_in.__dict__.items() if v is not None}
+        if not changes:
+            return select(*table.c).where(table.c.id == id, cls._live())
+        return (
+            update(table)
+            .where(table.c.id == id, cls._live())
+            .values(changes)
+            .returning(*table.c)
+        )
+
+    @classmethod
+    def _delete_one_statement(cls, id: int):
+        return cls._tombstone_statement(cls.model.__table__.c.id == id)
+
+    @classmethod
+    def _bulk_delete_statement(cls, db, ids: Sequence[int]):
+        table = cls.model.__table__
+        return cls._tombstone_statement(cls._id_in(db, table.c.id, ids)).returning(
+            table.c.id
+        )
+
+    @classmethod
+    def _tombstone_statement(cls, where):
+        # updated_at moves too, so the tombstone lands after the sync watermark
+        table = cls.model.__table__
+        return (
+            update(table)
+            .where(where, cls._live())
+            .values(deleted_at=utcnow(), updated_at=utcnow())
+        )
+
+    @staticmethod
+    def _in_order(rows, ids: Sequence[int]) -> List[Optional[ModelType]]:
+        by_id = {row.id: row for row in rows}
+        return [by_id.get(id) for id in ids]
+
+    @classmethod
+    def _page_statement(
+        cls,
+        first: Optional[int],
+        after: Optional[str],
+        last: Optional[int],
+        before: Optional[str],
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[Select, int]:
+        if first is not None and last is not None:
+            raise ValueError("Pass either `first` or `last`, not both")
+
+        keys = cls._cursor_keys()
+        key = tuple_(*keys) if len(keys) > 1 else keys[0]
+        statement = cls._select(columns)
+        if after is not None:
+            statement = statement.where(key > cls._cursor_value(after))
+        if before is not None:
+            statement = statement.where(key < cls._cursor_value(before))
+
+        # Fetch one extra row to learn whether another page exists
+        if last is not None:
+            size = clamp_page_size(last)
+            statement = statement.order_by(*[k.desc() for k in keys])
+        else:
+            size = clamp_page_size(first)
+            statement = statement.order_by(*keys)
+        return statement.limit(size + 1), size
+
+    @classmethod
+    def _search_statement(
+        cls,
+        db,
+        query: str,
+        first: Optional[int],
+        after: Optional[str],
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[Select, int]:
+        if not cls.search_columns:
+            raise ValueError(f"{cls.model.__name__} is not searchable")
+
+        # Postgres uses the generated tsvector column, anything else FTS5
+        search = postgres_search if cls._is_postgres(db) else sqlite_search
+        statement, rank = search(
+            cls._select(columns), cls.model, cls.search_columns, query
+        )
+        if after is not None:
+            after_rank, after_id = decode_cursor(after, 2)
+            statement = statement.where(
+                (rank < after_rank) | ((rank == after_rank) & (cls.model.id > after_id))
+            )
+        size = clamp_page_size(first)
+        statement = statement.order_by(rank.desc(), cls.model.id).limit(size + 1)
+        return statement, size
+
+    @classmethod
+    def _changes_statement(
+        cls,
+        since: Optional[str],
+        first: Optional[int],
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[Select, int]:
+        if columns is not None:
+            columns = [*columns, "updated_at", "deleted_at"]
+        statement = cls._select(columns, tombstones=since is not None)
+        key = tuple_(cls.model.updated_at, cls.model.id)
+        if since is not None:
+            statement = statement.where(key > tuple_(*decode_watermark(since)))
+        size = clamp_page_size(first)
+        statement = statement.order_by(cls.model.updated_at, cls.model.id)
+        return statement.limit(size + 1), size
+
+    @classmethod
+    def _purge_statement(cls, cutoff: datetime, batch_size: int):
+        # Oldest first along ix_note_updated_at_id; a tombstone's updated_at
+        # is when it was deleted
+        table = cls.model.__table__
+        batch = (
+            select(table.c.id)
+            .where(table.c.deleted_at.is_not(None), table.c.updated_at < cutoff)
+            .order_by(table.c.updated_at, table.c.id)
+            .limit(batch_size)
+        )
+        return delete(table).where(table.c.id.in_(batch.scalar_subquery()))
+
+    @staticmethod
+    def _horizon_statement(db):
+        return horizon_statement(db.get_bind().dialect.name)
+
+    @staticmethod
+    def _build_changes(
+        rows: Sequence[Any],
+        size: int,
+        since: Optional[str],
+        horizon: datetime,
+        reset: bool = False,
+    ) -> ChangeSet:
+        page = rows[:size]
+        watermark, has_more = since, len(rows) > size
+        if page and page[-1].updated_at > horizon:
+            # Rows past the horizon are returned now and again next time;
+            # everything up to it is already in this page
+            watermark, has_more = encode_watermark(horizon, 0), False
+        elif page:
+            watermark = encode_watermark(page[-1].updated_at, page[-1].id)
+        return ChangeSet(
+            items=[row for row in page if row.deleted_at is None],
+            deleted_ids=[row.id for row in page if row.deleted_at is not None],
+            watermark=watermark,
+            has_more=has_more,
+            reset=reset,
+        )
+
+    @staticmethod
+    def _search_hits(rows: Sequence[Row]) -> List[SearchHit]:
+        return [
+            SearchHit(item=item, rank=float(rank), snippet=snippet or "")
+            for item, rank, snippet in rows
+        ]
+
+    @staticmethod
+    def _build_page(
+        rows: Sequence[Any],
+        size: int,
+        backwards: bool,
+        after: Optional[str],
+        before: Optional[str],
+    ) -> Page:
+        if backwards:
+            return Page(
+                items=list(reversed(rows[:size])),
+                has_next_page=before is not None,
+                has_previous_page=len(rows) > size,
+            )
+        return Page(
+            items=list(rows[:size]),
+            has_next_page=len(rows) > size,
+            has_previous_page=after is not None,
+        )
+
+    @classmethod
+    def _cursor_keys(cls) -> list:
+        return [getattr(cls.model, name) for name in cls.cursor_columns]
+
+    @classmethod
+    def _cursor_value(cls, cursor: str):
+        values = decode_cursor(cursor, len(cls.cursor_columns))
+        return tuple_(*values) if len(values) > 1 else values[0]
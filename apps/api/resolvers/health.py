@@ -1,48 +1,186 @@
+import asyncio
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 
-from ..database import get_db
+from .. import database
+from ..replicas import parse_lsn, replica_router
+
+if TYPE_CHECKING:
+    from ..health_monitor import HealthSnapshot
+
+REPLICATION_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+# Replay position and lag of a standby; an idle primary makes the replay
+# timestamp age, so a standby that has replayed everything it received
+# counts as not lagging
+REPLICA_POSITION_QUERY = text(
+    "SELECT pg_last_wal_replay_lsn()::text, CASE "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
 
 
 class HealthResolver:
     @classmethod
-    def get_health_status(cls) -> Dict[str, Any]:
-        """Get comprehensive health status including database connectivity"""
-        health_data = {
-            "status": "ok",
-            "timestamp": datetime.now(timezone.utc),
-            "api": {"status": "ok"},
-            "database": {"status": "unknown", "connection": False, "details": None},
-        }
+    async def probe(cls) -> Dict[str, Any]:
+        """Probe the primary, and any replicas, through the resolvers' engines
 
-        # Check database connectivity
+        Called by the health monitor on its own schedule; health endpoints
+        read the monitor's snapshot instead of calling this. In async mode
+        the probe runs on the asyncpg engine, so its latency and pool use
+        are the resolvers' own; sync probes run off the event loop.
+        """
+        if database.is_async_mode():
+            probe = await cls.probe_database_async()
+            if replica_router is not None:
+                await cls.probe_replicas_async()
+            return probe
+        probe = await asyncio.to_thread(cls.probe_database)
+        if replica_router is not None:
+            await asyncio.to_thread(cls.probe_replicas)
+        return probe
+
+    @classmethod
+    def probe_database(cls) -> Dict[str, Any]:
+        """Run one connectivity check on the sync engine and time it"""
+        started = time.perf_counter()
         try:
-            db: Session = next(get_db())
+            with database.engine.connect() as connection:
+                return cls._probe(connection, started)
+        except Exception as db_error:
+            return cls._failed_probe(db_error)
+
+    @classmethod
+    async def probe_database_async(cls) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            async with database.get_async_engine().connect() as connection:
+                return await connection.run_sync(cls._probe, started)
+        except Exception as db_error:
+            return cls._failed_probe(db_error)
+
+    @staticmethod
+    def _new_probe() -> Dict[str, Any]:
+        return {
+            "status": "unknown",
+            "connection": False,
+            "details": None,
+            "latency_ms": None,
+            "replication_lag_seconds": None,
+        }
+
+    @classmethod
+    def _failed_probe(cls, db_error: Exception) -> Dict[str, Any]:
+        probe = cls._new_probe()
+        probe["status"] = "error"
+        probe["details"] = f"Database error: {str(db_error)}"
+        return probe
+
+    @classmethod
+    def _probe(cls, connection: Any, started: float) -> Dict[str, Any]:
+        probe = cls._new_probe()
+        # Simple query to test connection
+        result = connection.execute(text("SELECT 1")).scalar()
+        probe["latency_ms"] = (time.perf_counter() - started) * 1000
+        if result == 1:
+            probe["status"] = "ok"
+            probe["connection"] = True
+            probe["details"] = "Connected successfully"
+        else:
+            probe["status"] = "degraded"
+            probe["details"] = "Unexpected query result"
+
+        if connection.dialect.name == "postgresql":
+            lag = connection.execute(REPLICATION_LAG_QUERY).scalar()
+            probe["replication_lag_seconds"] = float(lag) if lag is not None else None
+        return probe
+
+    @classmethod
+    def probe_replicas(cls) -> None:
+        """Check every read replica and tell the router what was found"""
+        for index, engine in enumerate(database.get_replica_engines()):
+            try:
+                with engine.connect() as connection:
+                    cls._probe_replica(connection, index)
+            except Exception:
+                replica_router.record_probe(index, ok=False)
+
+    @classmethod
+    async def probe_replicas_async(cls) -> None:
+        for index, engine in enumerate(database.get_async_replica_engines()):
             try:
-                # Simple query to test connection
-                result = db.execute(text("SELECT 1")).scalar()
-                if result == 1:
-                    health_data["database"]["status"] = "ok"
-                    health_data["database"]["connection"] = True
-                    health_data["database"]["details"] = "Connected successfully"
-                else:
-                    health_data["database"]["status"] = "error"
-                    health_data["database"]["details"] = "Unexpected query result"
-                    health_data["status"] = "degraded"
-            except Exception as db_error:
-                health_data["database"]["status"] = "error"
-                health_data["database"]["details"] = f"Database error: {str(db_error)}"
-                health_data["status"] = "error"
-            finally:
-                db.close()
-        except Exception as connection_error:
-            health_data["database"]["status"] = "error"
-            health_data["database"][
-                "details"
-            ] = f"Connection error: {str(connection_error)}"
-            health_data["status"] = "error"
-
-        return health_data
+                async with engine.connect() as connection:
+                    await connection.run_sync(cls._probe_replica, index)
+            except Exception:
+                replica_router.record_probe(index, ok=False)
+
+    @staticmethod
+    def _probe_replica(connection: Any, index: int) -> None:
+        if connection.dialect.name != "postgresql":
+            connection.execute(text("SELECT 1"))
+            replica_router.record_probe(index, ok=True)
+            return
+        lsn, lag = connection.execute(REPLICA_POSITION_QUERY).one()
+        replica_router.record_probe(
+            index,
+            ok=True,
+            replay_lsn=parse_lsn(lsn) if lsn is not None else None,
+            lag_seconds=float(lag) if lag is not None else None,
+        )
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Any]:
+        """Checked-out connections against the pool's capacity
+
+        Reads the resolvers' pool without creating its engine. The "null"
+        strategy keeps no pool in the process, so only the strategy and
+        whether the pooled URL is in use are reported.
+        """
+        stats: Dict[str, Any] = {
+            "strategy": database.pool_strategy(),
+            "external_pooler": database.uses_external_pooler(),
+        }
+        pool = database.resolver_pool()
+        if not isinstance(pool, QueuePool):
+            return stats
+
+        size = pool.size()
+        checked_out = pool.checkedout()
+        max_overflow = pool._max_overflow
+        stats.update(
+            {
+                "size": size,
+                "checked_out": checked_out,
+                "overflow": pool.overflow(),
+                "max_overflow": max_overflow,
+                "saturation": None,
+            }
+        )
+        # A negative max_overflow means the pool never blocks
+        if max_overflow >= 0 and size + max_overflow > 0:
+            stats["saturation"] = checked_out / (size + max_overflow)
+        return stats
+
+    @classmethod
+    def get_health_status(cls, snapshot: "HealthSnapshot") -> Dict[str, Any]:
+        """Shape the monitor's latest snapshot for the GraphQL `health` field"""
+        database_status = snapshot.database
+        status = database_status["status"]
+        if status == "unknown" or (status == "ok" and snapshot.stale):
+            status = "degraded"
+
+        checked_at: Optional[datetime] = snapshot.checked_at
+        return {
+            "status": status,
+            "timestamp": checked_at or datetime.now(timezone.utc),
+            "stale": snapshot.stale,
+            "api": {"status": "ok"},
+            "database": database_status,
+        }
@@ -5,3 +5,4 @@ from .base import BaseResolver
 
 class NoteResolver(BaseResolver[NoteModel, CreateNoteInput, UpdateNoteInput]):
     model = NoteModel
+    search_columns = ("title", "content")
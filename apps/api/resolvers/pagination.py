@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ItemType = TypeVar("ItemType")
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[ItemType]):
+    items: List[ItemType]
+    has_next_page: bool
+    has_previous_page: bool
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor"""
+    payload = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor` into `size` keyset values"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return values
+
+
+def clamp_page_size(size: Optional[int]) -> int:
+    """Apply the default page size and cap requests at `MAX_PAGE_SIZE`"""
+    if size is None:
+        return DEFAULT_PAGE_SIZE
+    if size < 0:
+        raise ValueError("Page size must not be negative")
+    return min(size, MAX_PAGE_SIZE)
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Any, Generic, Sequence, Tuple, TypeVar
+
+from sqlalchemy import ColumnElement, Float, Select, cast
+from sqlalchemy import column as sa_column
+from sqlalchemy import func, literal, literal_column, table
+
+ItemType = TypeVar("ItemType")
+
+# Text search configuration used by the generated column and by queries
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+
+@dataclass
+class SearchHit(Generic[ItemType]):
+    item: ItemType
+    rank: float
+    snippet: str
+
+
+def fts_table_name(table_name: str) -> str:
+    """Name of the SQLite FTS5 table shadowing `table_name`"""
+    return f"{table_name}_fts"
+
+
+def fts5_match_query(query: str) -> str:
+    """Quote every term so user input can never be FTS5 query syntax"""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def postgres_search(
+    statement: Select, model: Any, columns: Sequence[str], query: str
+) -> Tuple[Select, ColumnElement]:
+    """Match against the generated `search_vector` column, ranked by `ts_rank`"""
+    from sqlalchemy.dialects.postgresql import TSVECTOR
+
+    table_name = model.__table__.name
+    search_vector = literal_column(f"{table_name}.search_vector", TSVECTOR)
+    # Inline the config so drivers never have to bind a regconfig parameter
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    ts_query = func.websearch_to_tsquery(config, query)
+    # ts_rank returns real; as a double the value in the cursor compares
+    # equal to the column again, so tied ranks neither skip nor repeat rows
+    rank = cast(func.ts_rank(search_vector, ts_query), Float(53))
+
+    document = func.concat_ws(" ", *[getattr(model, name) for name in columns])
+    snippet = func.ts_headline(
+        config,
+        document,
+        ts_query,
+        f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2",
+    )
+    statement = statement.add_columns(
+        rank.label("rank"), snippet.label("snippet")
+    ).where(search_vector.op("@@")(ts_query))
+    return statement, rank
+
+
+def sqlite_search(
+    statement: Select, model: Any, columns: Sequence[str], query: str
+) -> Tuple[Select, ColumnElement]:
+    """Match against the FTS5 shadow table, ranked by (negated) `bm25`"""
+    fts = table(fts_table_name(model.__table__.name), sa_column("rowid"))
+    fts_ref = literal_column(fts.name)
+    # bm25 is lower-is-better; negate it so both dialects sort rank DESC
+    rank = -func.bm25(fts_ref)
+    snippet = func.snippet(
+        fts_ref, -1, HIGHLIGHT_START, HIGHLIGHT_STOP, literal("…"), 16
+    )
+    statement = (
+        statement.add_columns(rank.label("rank"), snippet.label("snippet"))
+        .join_from(model, fts, fts.c.rowid == model.id)
+        .where(fts_ref.op("MATCH")(fts5_match_query(query)))
+    )
+    return statement, rank
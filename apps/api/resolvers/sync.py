@@ -0,0 +1,115 @@
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import literal, select, text
+
+from ..models.base import utcnow
+from .pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+ItemType = TypeVar("ItemType")
+
+logger = logging.getLogger(__name__)
+
+# Rows are stamped (by the database's clock) before they commit, so a row
+# can become visible behind a position already handed out: a slow
+# ATOMIC_MUTATIONS operation, a COPY import stamped with its transaction's
+# start. Watermarks therefore stay this far behind the newest safe time, and
+# the next sync scans that window again.
+SYNC_SAFETY_LAG = timedelta(seconds=float(os.getenv("SYNC_SAFETY_LAG_SECONDS", "5")))
+# Used instead when the database hides other roles' transactions from us
+SYNC_BLIND_LAG = timedelta(seconds=float(os.getenv("SYNC_BLIND_LAG_SECONDS", "300")))
+
+# Tombstones older than this are purged (`BaseResolver.purge_tombstones`),
+# so a watermark older than this may have missed deletes and gets a full
+# resync instead. 0 keeps tombstones forever.
+TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30")))
+# Extra age a tombstone needs before it is purged, so a purge that starts
+# while a sync is running cannot remove what that sync still expects
+PURGE_MARGIN = timedelta(hours=1)
+
+# The database's clock, and the same clock held back to the start of the
+# oldest open transaction: its rows may still appear, stamped with that
+# start. Other roles' sessions show a NULL xact_start unless the app role
+# has pg_read_all_stats; `complete` says whether they were counted.
+POSTGRES_HORIZON_QUERY = text(
+    "SELECT timezone('utc', now()) AS now, "
+    "timezone('utc', least(now(), min(xact_start))) AS oldest, "
+    "pg_has_role('pg_read_all_stats', 'USAGE') AS complete "
+    "FROM pg_stat_activity WHERE datname = current_database()"
+)
+
+_warned_blind = False
+
+
+@dataclass
+class ChangeSet(Generic[ItemType]):
+    """Rows written after a watermark, split into live rows and tombstones"""
+
+    items: List[ItemType]
+    deleted_ids: List[int]
+    # Where the next sync starts; the `since` passed in when nothing changed
+    watermark: Optional[str]
+    has_more: bool
+    # `since` predated TOMBSTONE_RETENTION: this is a first sync again, and
+    # the client must replace its copy rather than apply a diff
+    reset: bool = False
+
+
+def encode_watermark(updated_at: datetime, id: int) -> str:
+    """An opaque position in `(updated_at, id)` order"""
+    return encode_cursor([updated_at.isoformat(), id])
+
+
+def decode_watermark(watermark: str) -> Tuple[datetime, int]:
+    updated_at, id = decode_cursor(watermark, 2)
+    try:
+        return datetime.fromisoformat(updated_at), int(id)
+    except (TypeError, ValueError):
+        raise InvalidCursorError(f"Invalid watermark: {watermark!r}")
+
+
+def horizon_statement(dialect_name: str):
+    """Reads `(now, oldest, complete)` from the database for a sync"""
+    if dialect_name == "postgresql":
+        return POSTGRES_HORIZON_QUERY
+    return select(
+        utcnow().label("now"), utcnow().label("oldest"), literal(True).label("complete")
+    )
+
+
+def sync_horizon(oldest: datetime, complete: bool = True) -> datetime:
+    """The newest `updated_at` a watermark may hand out, as naive UTC
+
+    `oldest` comes from `horizon_statement`, so it shares a clock with every
+    row's `updated_at`. Without a `complete` view of open transactions the
+    horizon falls back to SYNC_BLIND_LAG.
+    """
+    global _warned_blind
+    lag = SYNC_SAFETY_LAG
+    if not complete:
+        lag = max(lag, SYNC_BLIND_LAG)
+        if not _warned_blind:
+            _warned_blind = True
+            logger.warning(
+                "sync cannot see other roles' transactions; grant "
+                "pg_read_all_stats to the app role, holding watermarks %ss back",
+                lag.total_seconds(),
+            )
+    return oldest - lag
+
+
+def purge_cutoff(now: datetime) -> Optional[datetime]:
+    """Tombstones stamped before this may be purged; None keeps them all"""
+    if not TOMBSTONE_RETENTION:
+        return None
+    return now - TOMBSTONE_RETENTION - PURGE_MARGIN
+
+
+def needs_resync(since: Optional[str], now: datetime) -> bool:
+    """Whether deletes after `since` may already have been purged"""
+    if since is None or not TOMBSTONE_RETENTION:
+        return False
+    return decode_watermark(since)[0] < now - TOMBSTONE_RETENTION
@@ -1,7 +1,12 @@
 import strawberry
 
+from .instrumentation import RESOLVER_TIMING, RequestInstrumentation, ResolverTiming
+from .persisted_queries import PersistedQueries
+from .query_cost import QueryCostLimiter
+from .query_profiler import QueryProfilerExtension, query_profiler
 from .schemas.health import HealthQueries
-from .schemas.note import NoteMutations, NoteQueries
+from .schemas.note import NoteMutations, NoteQueries, NoteSubscriptions
+from .unit_of_work import UnitOfWorkExtension
 
 
 @strawberry.type
@@ -14,4 +19,24 @@ class Mutation(NoteMutations):
     pass
 
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+@strawberry.type
+class Subscription(NoteSubscriptions):
+    pass
+
+
+extensions = [
+    PersistedQueries,
+    QueryCostLimiter,
+    ResolverTiming if RESOLVER_TIMING else RequestInstrumentation,
+    # Innermost, so the commit counts towards the execute phase
+    UnitOfWorkExtension,
+]
+if query_profiler is not None:
+    extensions.append(QueryProfilerExtension)
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=extensions,
+)
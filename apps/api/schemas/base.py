@@ -1,15 +1,132 @@
-from typing import Any, Generic, List, Optional, Type, TypeVar
+import dataclasses
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from strawberry import UNSET
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField, Selection
 
-from ..database import get_db
+from ..cache import freeze, query_cache
+from ..context import Context
+from ..database import (
+    AsyncSessionLocal,
+    get_db,
+    is_async_mode,
+    record_primary_write,
+    replica_reads,
+)
+from ..pubsub import change_hub, publish_changes
+from ..replicas import must_read_own_writes, replica_router
+from ..resolver_executor import resolver_executor
 from ..resolvers.base import BaseResolver
+from ..resolvers.pagination import DEFAULT_PAGE_SIZE, Page
+from ..resolvers.sync import ChangeSet
+from ..types.pagination import (
+    Connection,
+    Edge,
+    PageInfo,
+    SearchConnection,
+    SearchEdge,
+)
+from ..types.sync import Changes
+from ..unit_of_work import current_unit_of_work, pending_write
 
 ResolverType = TypeVar("ResolverType", bound=BaseResolver)
 GraphQLType = TypeVar("GraphQLType")
 CreateInputType = TypeVar("CreateInputType")
 UpdateInputType = TypeVar("UpdateInputType")
 
+# Reads whose results the query cache may hold, by invalidation scope
+LIST_QUERIES = frozenset({"get_all_query", "get_page_query", "search_query"})
+ID_QUERIES = frozenset({"get_by_id_query"})
+# Reads that may be served by a read replica. Not syncs: rows a lagging
+# replica has not replayed could end up behind the watermark it returns, and
+# only the primary knows which transactions are still writing
+REPLICA_QUERIES = LIST_QUERIES | ID_QUERIES | {"get_by_ids_query"}
+
+# Writes, mapped to the ids whose cached results they make stale
+WRITTEN_IDS: Dict[str, Callable[[tuple, Any], Iterable[int]]] = {
+    "create_mutation": lambda args, result: [result.id],
+    "bulk_create_mutation": lambda args, result: [item.id for item in result],
+    "update_mutation": lambda args, result: [args[0]],
+    "delete_mutation": lambda args, result: [args[0]],
+    "bulk_update_mutation": lambda args, result: [id for id, _ in args[0]],
+    "bulk_delete_mutation": lambda args, result: args[0],
+}
+
+# Writes, mapped to the change event they publish and the ids that changed
+CHANGED_IDS: Dict[str, Tuple[str, Callable[[tuple, Any], Iterable[int]]]] = {
+    "create_mutation": ("created", WRITTEN_IDS["create_mutation"]),
+    "bulk_create_mutation": ("created", WRITTEN_IDS["bulk_create_mutation"]),
+    "update_mutation": (
+        "updated",
+        lambda args, result: [args[0]] if result is not None else [],
+    ),
+    "delete_mutation": ("deleted", lambda args, result: [args[0]] if result else []),
+    "bulk_update_mutation": (
+        "updated",
+        lambda args, result: [
+            id for (id, _), item in zip(args[0], result) if item is not None
+        ],
+    ),
+    "bulk_delete_mutation": (
+        "deleted",
+        lambda args, result: [id for id, deleted in zip(args[0], result) if deleted],
+    ),
+}
+
+
+@lru_cache(maxsize=1024)
+def _compile_converter(
+    graphql_type: type, model: type, fields: Optional[FrozenSet[str]]
+) -> Callable[[Any], Any]:
+    """Generate `lambda obj: graphql_type(id=obj.id, ...)` for one selection
+
+    Field lookups, `hasattr` checks and UNSET placeholders are resolved here,
+    once, so converting a row is a single call with plain attribute reads.
+    Anything with the model's attribute names converts, ORM objects and
+    `Row` tuples alike.
+    """
+    arguments = []
+    for field in dataclasses.fields(graphql_type):
+        if not field.init:
+            continue
+        if fields is not None and field.name not in fields:
+            arguments.append(f"{field.name}=UNSET")
+        elif hasattr(model, field.name):
+            arguments.append(f"{field.name}=obj.{field.name}")
+
+    source = f"lambda obj: graphql_type({', '.join(arguments)})"
+    return eval(source, {"graphql_type": graphql_type, "UNSET": UNSET})
+
+
+def _selected_fields(selections: Iterable[Selection]) -> Iterator[SelectedField]:
+    """Flatten fragment spreads and inline fragments into plain fields"""
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            yield selection
+        else:
+            yield from _selected_fields(selection.selections)
+
 
 class BaseSchemaGenerator(
     Generic[ResolverType, GraphQLType, CreateInputType, UpdateInputType]
@@ -18,63 +135,546 @@ class BaseSchemaGenerator(
     graphql_type: Type[GraphQLType]
 
     @classmethod
-    def model_to_graphql(cls, model_instance: Any) -> GraphQLType:
-        """Convert SQLAlchemy model instance to GraphQL type"""
-        model_dict = {}
+    async def resolve(cls, operation: str, *args: Any, **kwargs: Any) -> Any:
+        """Run `operation` on the configured database path
 
-        # Get all GraphQL type fields using __annotations__
-        graphql_fields = getattr(cls.graphql_type, "__annotations__", {})
+        In async mode this awaits `<operation>_async` on an AsyncSession so the
+        event loop stays free while Postgres works; otherwise the sync method
+        runs as before. Reads listed in LIST_QUERIES/ID_QUERIES go through the
+        query cache when it is enabled, and writes in WRITTEN_IDS invalidate it
+        and publish change events to subscribers. With read replicas, reads in
+        REPLICA_QUERIES may be served by one and writes pin the client to
+        the primary until the replicas have caught up; what the cache holds
+        is always read from the primary. Inside a GraphQL
+        operation every call shares the operation's unit of work.
+        """
+        if operation in CHANGED_IDS:
+            result = await cls._execute(operation, *args, **kwargs)
+            written = partial(cls._written, operation, args, result)
+            unit = current_unit_of_work.get()
+            if unit is None:
+                await written()
+            else:
+                # With atomic mutations this waits for the operation's commit
+                await unit.record_write(written)
+            return result
+        if query_cache is None or must_read_own_writes() or pending_write():
+            return await cls._read(operation, *args, **kwargs)
 
-        for field_name in graphql_fields.keys():
-            if hasattr(model_instance, field_name):
-                model_dict[field_name] = getattr(model_instance, field_name)
+        model = cls.resolver_class.model.__tablename__
+        if operation in LIST_QUERIES:
+            key = query_cache.list_key(model, operation, freeze((args, kwargs)))
+        elif operation in ID_QUERIES:
+            id, *rest = args
+            key = query_cache.id_key(model, operation, id, freeze((rest, kwargs)))
+        else:
+            return await cls._read(operation, *args, **kwargs)
 
-        return cls.graphql_type(**model_dict)
+        hit, result = query_cache.get(key)
+        if not hit:
+            # From the primary: a lagging replica's rows, cached under the
+            # generation a write just started, would be served to everyone
+            result = await cls._execute(operation, *args, **kwargs)
+            query_cache.set(key, result)
+        return result
+
+    @classmethod
+    async def _written(cls, operation: str, args: tuple, result: Any) -> None:
+        """Make a committed write visible: cache, subscribers, read-after token"""
+        model = cls.resolver_class.model.__tablename__
+        if query_cache is not None:
+            query_cache.invalidate(model, WRITTEN_IDS[operation](args, result))
+        action, changed_ids = CHANGED_IDS[operation]
+        publish_changes(model, action, changed_ids(args, result))
+        await record_primary_write()
+
+    @classmethod
+    async def _read(cls, operation: str, *args: Any, **kwargs: Any) -> Any:
+        if (
+            replica_router is None
+            or operation not in REPLICA_QUERIES
+            or pending_write()
+        ):
+            return await cls._execute(operation, *args, **kwargs)
+        try:
+            with replica_reads():
+                return await cls._execute(operation, *args, **kwargs)
+        except (OperationalError, InterfaceError):
+            # The replica went away mid-read; it is marked failed, so retry
+            # once on the primary rather than failing the request
+            return await cls._execute(operation, *args, **kwargs)
 
     @classmethod
-    def get_all_query(cls) -> List[GraphQLType]:
+    async def _execute(cls, operation: str, *args: Any, **kwargs: Any) -> Any:
+        if is_async_mode():
+            return await getattr(cls, f"{operation}_async")(*args, **kwargs)
+        method = getattr(cls, operation)
+        if resolver_executor is None:
+            return method(*args, **kwargs)
+
+        # Blocking psycopg2 calls run on the resolver threads
+        unit = current_unit_of_work.get()
+        if unit is not None:
+            await unit.use_worker(resolver_executor)
+            return await unit.run(method, *args, **kwargs)
+        async with resolver_executor.slot():
+            return await resolver_executor.run(method, *args, **kwargs)
+
+    @staticmethod
+    @contextmanager
+    def session() -> Iterator[Session]:
+        """The operation's shared session, or one of its own outside an operation"""
+        unit = current_unit_of_work.get()
+        if unit is not None:
+            with unit.session(lambda: next(get_db())) as db:
+                yield db
+            return
         db: Session = next(get_db())
         try:
-            models = cls.resolver_class.get_all(db)
-            return [cls.model_to_graphql(model) for model in models]
+            yield db
         finally:
             db.close()
 
+    @staticmethod
+    @asynccontextmanager
+    async def async_session() -> AsyncIterator[AsyncSession]:
+        unit = current_unit_of_work.get()
+        if unit is not None:
+            async with unit.async_session(AsyncSessionLocal) as db:
+                yield db
+            return
+        async with AsyncSessionLocal() as db:
+            yield db
+
     @classmethod
-    def get_by_id_query(cls, id: int) -> Optional[GraphQLType]:
-        db: Session = next(get_db())
-        try:
-            model = cls.resolver_class.get_by_id(db, id)
+    def requested_fields(cls, info: Info, *path: str) -> List[str]:
+        """Python names of `graphql_type` fields the client selected
+
+        `path` walks down from the current field, e.g. `("edges", "node")`
+        for a connection. Resolvers pass the result on so only those columns
+        are read from the database.
+        """
+        fields = info.selected_fields
+        for name in path:
+            fields = [
+                child
+                for field in fields
+                for child in _selected_fields(field.selections)
+                if child.name == name
+            ]
+        selected = {
+            child.name
+            for field in fields
+            for child in _selected_fields(field.selections)
+        }
+
+        name_converter = info.schema.config.name_converter
+        return [
+            field.python_name
+            for field in cls.graphql_type.__strawberry_definition__.fields
+            if name_converter.get_graphql_name(field) in selected
+        ]
+
+    @classmethod
+    def model_to_graphql(
+        cls, model_instance: Any, fields: Optional[List[str]] = None
+    ) -> GraphQLType:
+        """Convert SQLAlchemy model instance to GraphQL type
+
+        When `fields` is given, only those attributes are read; the rest are
+        left UNSET since the client never asked for them.
+        """
+        return cls.converter(fields)(model_instance)
+
+    @classmethod
+    def models_to_graphql(
+        cls, models: Iterable[Any], fields: Optional[List[str]] = None
+    ) -> List[GraphQLType]:
+        """Convert a result set with one precompiled converter"""
+        convert = cls.converter(fields)
+        return [convert(model) for model in models]
+
+    @classmethod
+    def converter(cls, fields: Optional[List[str]] = None) -> Callable[[Any], Any]:
+        return _compile_converter(
+            cls.graphql_type,
+            cls.resolver_class.model,
+            frozenset(fields) if fields is not None else None,
+        )
+
+    @classmethod
+    def page_to_connection(
+        cls, page: Page, fields: Optional[List[str]] = None
+    ) -> Connection[GraphQLType]:
+        convert = cls.converter(fields)
+        edges = [
+            Edge(cursor=cls.resolver_class.cursor_for(model), node=convert(model))
+            for model in page.items
+        ]
+        return Connection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=page.has_next_page,
+                has_previous_page=page.has_previous_page,
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+        )
+
+    @classmethod
+    def page_to_search_connection(
+        cls, page: Page, fields: Optional[List[str]] = None
+    ) -> SearchConnection[GraphQLType]:
+        convert = cls.converter(fields)
+        edges = [
+            SearchEdge(
+                cursor=cls.resolver_class.search_cursor_for(hit),
+                node=convert(hit.item),
+                rank=hit.rank,
+                snippet=hit.snippet,
+            )
+            for hit in page.items
+        ]
+        return SearchConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=page.has_next_page,
+                has_previous_page=page.has_previous_page,
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+        )
+
+    @classmethod
+    def changes_to_graphql(
+        cls, changes: ChangeSet, fields: Optional[List[str]] = None
+    ) -> Changes[GraphQLType]:
+        return Changes(
+            items=cls.models_to_graphql(changes.items, fields),
+            deleted_ids=changes.deleted_ids,
+            has_more=changes.has_more,
+            watermark=changes.watermark,
+            reset=changes.reset,
+        )
+
+    @staticmethod
+    def filters_from_input(filter: Any) -> Dict[str, Any]:
+        """Flatten a filter input into resolver `filters`, dropping unset keys"""
+        if filter is None:
+            return {}
+        return {
+            key: value
+            for key, value in dataclasses.asdict(filter).items()
+            if value is not None
+        }
+
+    @staticmethod
+    def order_from_input(order_by: Optional[List[Any]]) -> Tuple[Tuple[str, str], ...]:
+        """Turn `[{field, direction}]` inputs into resolver `order_by` pairs"""
+        return tuple(
+            (item.field.value, item.direction.value) for item in order_by or ()
+        )
+
+    @classmethod
+    def get_all_query(
+        cls,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> List[GraphQLType]:
+        with cls.session() as db:
+            models = cls.resolver_class.get_all(
+                db, limit=limit, columns=fields, filters=filters, order_by=order_by
+            )
+            return cls.models_to_graphql(models, fields)
+
+    @classmethod
+    async def get_all_query_async(
+        cls,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> List[GraphQLType]:
+        async with cls.async_session() as db:
+            models = await cls.resolver_class.get_all_async(
+                db, limit=limit, columns=fields, filters=filters, order_by=order_by
+            )
+            return cls.models_to_graphql(models, fields)
+
+    @classmethod
+    def get_page_query(
+        cls,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Connection[GraphQLType]:
+        with cls.session() as db:
+            page = cls.resolver_class.get_page(
+                db,
+                first=first,
+                after=after,
+                last=last,
+                before=before,
+                columns=fields,
+            )
+            return cls.page_to_connection(page, fields)
+
+    @classmethod
+    async def get_page_query_async(
+        cls,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Connection[GraphQLType]:
+        async with cls.async_session() as db:
+            page = await cls.resolver_class.get_page_async(
+                db,
+                first=first,
+                after=after,
+                last=last,
+                before=before,
+                columns=fields,
+            )
+            return cls.page_to_connection(page, fields)
+
+    @classmethod
+    def search_query(
+        cls,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> SearchConnection[GraphQLType]:
+        with cls.session() as db:
+            page = cls.resolver_class.search(
+                db, query, first=first, after=after, columns=fields
+            )
+            return cls.page_to_search_connection(page, fields)
+
+    @classmethod
+    async def search_query_async(
+        cls,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> SearchConnection[GraphQLType]:
+        async with cls.async_session() as db:
+            page = await cls.resolver_class.search_async(
+                db, query, first=first, after=after, columns=fields
+            )
+            return cls.page_to_search_connection(page, fields)
+
+    @classmethod
+    def get_changes_query(
+        cls,
+        since: Optional[str] = None,
+        first: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Changes[GraphQLType]:
+        with cls.session() as db:
+            changes = cls.resolver_class.get_changes(
+                db, since=since, first=first, columns=fields
+            )
+            return cls.changes_to_graphql(changes, fields)
+
+    @classmethod
+    async def get_changes_query_async(
+        cls,
+        since: Optional[str] = None,
+        first: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Changes[GraphQLType]:
+        async with cls.async_session() as db:
+            changes = await cls.resolver_class.get_changes_async(
+                db, since=since, first=first, columns=fields
+            )
+            return cls.changes_to_graphql(changes, fields)
+
+    @classmethod
+    def get_by_id_query(
+        cls, id: int, fields: Optional[List[str]] = None
+    ) -> Optional[GraphQLType]:
+        with cls.session() as db:
+            model = cls.resolver_class.get_by_id(db, id, columns=fields)
             if not model:
                 return None
-            return cls.model_to_graphql(model)
-        finally:
-            db.close()
+            return cls.model_to_graphql(model, fields)
+
+    @classmethod
+    async def get_by_id_query_async(
+        cls, id: int, fields: Optional[List[str]] = None
+    ) -> Optional[GraphQLType]:
+        async with cls.async_session() as db:
+            model = await cls.resolver_class.get_by_id_async(db, id, columns=fields)
+            if not model:
+                return None
+            return cls.model_to_graphql(model, fields)
+
+    @classmethod
+    def get_by_ids_query(
+        cls, ids: List[int], fields: Optional[List[str]] = None
+    ) -> List[Optional[GraphQLType]]:
+        with cls.session() as db:
+            models = cls.resolver_class.get_by_ids(db, ids, columns=fields)
+            convert = cls.converter(fields)
+            return [convert(model) if model else None for model in models]
+
+    @classmethod
+    async def get_by_ids_query_async(
+        cls, ids: List[int], fields: Optional[List[str]] = None
+    ) -> List[Optional[GraphQLType]]:
+        async with cls.async_session() as db:
+            models = await cls.resolver_class.get_by_ids_async(db, ids, columns=fields)
+            convert = cls.converter(fields)
+            return [convert(model) if model else None for model in models]
+
+    @classmethod
+    async def load_by_ids(
+        cls, keys: List[Tuple[int, FrozenSet[str]]]
+    ) -> List[Optional[GraphQLType]]:
+        """DataLoader batch function: one `WHERE id = ANY(:ids)` per tick
+
+        Each key pairs an id with the fields its caller selected; the batch
+        loads the union of those columns.
+        """
+        ids = list(dict.fromkeys(id for id, _ in keys))
+        fields = sorted(frozenset().union(*(fields for _, fields in keys)))
+        if query_cache is None or must_read_own_writes() or pending_write():
+            results = await cls.resolve("get_by_ids_query", ids, fields=fields)
+            by_id = dict(zip(ids, results))
+            return [by_id[id] for id, _ in keys]
+
+        # Serve cached ids and only query the rest
+        model = cls.resolver_class.model.__tablename__
+        cache_keys = {
+            id: query_cache.id_key(model, "get_by_ids_query", id, tuple(fields))
+            for id in ids
+        }
+        by_id = {}
+        for id, cache_key in cache_keys.items():
+            hit, result = query_cache.get(cache_key)
+            if hit:
+                by_id[id] = result
+
+        missing = [id for id in ids if id not in by_id]
+        if missing:
+            results = await cls.resolve("get_by_ids_query", missing, fields=fields)
+            for id, result in zip(missing, results):
+                by_id[id] = result
+                query_cache.set(cache_keys[id], result)
+        return [by_id[id] for id, _ in keys]
+
+    @classmethod
+    async def load_by_id(cls, info: Info, id: int) -> Optional[GraphQLType]:
+        """Fetch by id through the request's DataLoader when there is one"""
+        fields = cls.requested_fields(info)
+        if isinstance(info.context, Context):
+            return await info.context.by_id_loader(cls).load((id, frozenset(fields)))
+        return await cls.resolve("get_by_id_query", id, fields=fields)
+
+    @classmethod
+    async def changes(cls, action: str) -> AsyncIterator[Any]:
+        """Stream `action` ("created", "updated", "deleted") events as they happen
+
+        Deletions yield the id; the rest yield the row as it is now, read
+        once per event from the primary (a replica may not have it yet) and
+        shared by every subscriber. A row already gone by then is skipped.
+        """
+        model = cls.resolver_class.model.__tablename__
+        with change_hub.subscribe(model, action) as subscriber:
+            async for event in subscriber:
+                if action == "deleted":
+                    yield event.id
+                    continue
+                item = await event.item(lambda id: cls._execute("get_by_id_query", id))
+                if item is not None:
+                    yield item
 
     @classmethod
     def create_mutation(cls, input: CreateInputType) -> GraphQLType:
-        db: Session = next(get_db())
-        try:
+        with cls.session() as db:
             model = cls.resolver_class.create(db, input)
             return cls.model_to_graphql(model)
-        finally:
-            db.close()
+
+    @classmethod
+    async def create_mutation_async(cls, input: CreateInputType) -> GraphQLType:
+        async with cls.async_session() as db:
+            model = await cls.resolver_class.create_async(db, input)
+            return cls.model_to_graphql(model)
 
     @classmethod
     def update_mutation(cls, id: int, input: UpdateInputType) -> Optional[GraphQLType]:
-        db: Session = next(get_db())
-        try:
+        with cls.session() as db:
             model = cls.resolver_class.update(db, id, input)
             if not model:
                 return None
             return cls.model_to_graphql(model)
-        finally:
-            db.close()
+
+    @classmethod
+    async def update_mutation_async(
+        cls, id: int, input: UpdateInputType
+    ) -> Optional[GraphQLType]:
+        async with cls.async_session() as db:
+            model = await cls.resolver_class.update_async(db, id, input)
+            if not model:
+                return None
+            return cls.model_to_graphql(model)
 
     @classmethod
     def delete_mutation(cls, id: int) -> bool:
-        db: Session = next(get_db())
-        try:
+        with cls.session() as db:
             return cls.resolver_class.delete(db, id)
-        finally:
-            db.close()
+
+    @classmethod
+    async def delete_mutation_async(cls, id: int) -> bool:
+        async with cls.async_session() as db:
+            return await cls.resolver_class.delete_async(db, id)
+
+    @classmethod
+    def bulk_create_mutation(cls, inputs: List[CreateInputType]) -> List[GraphQLType]:
+        with cls.session() as db:
+            rows = cls.resolver_class.bulk_create(db, inputs)
+            return cls.models_to_graphql(rows)
+
+    @classmethod
+    async def bulk_create_mutation_async(
+        cls, inputs: List[CreateInputType]
+    ) -> List[GraphQLType]:
+        async with cls.async_session() as db:
+            rows = await cls.resolver_class.bulk_create_async(db, inputs)
+            return cls.models_to_graphql(rows)
+
+    @classmethod
+    def bulk_update_mutation(
+        cls, items: Sequence[Tuple[int, UpdateInputType]]
+    ) -> List[Optional[GraphQLType]]:
+        with cls.session() as db:
+            rows = cls.resolver_class.bulk_update(db, items)
+            convert = cls.converter()
+            return [convert(row) if row else None for row in rows]
+
+    @classmethod
+    async def bulk_update_mutation_async(
+        cls, items: Sequence[Tuple[int, UpdateInputType]]
+    ) -> List[Optional[GraphQLType]]:
+        async with cls.async_session() as db:
+            rows = await cls.resolver_class.bulk_update_async(db, items)
+            convert = cls.converter()
+            return [convert(row) if row else None for row in rows]
+
+    @classmethod
+    def bulk_delete_mutation(cls, ids: List[int]) -> List[bool]:
+        with cls.session() as db:
+            return cls.resolver_class.bulk_delete(db, ids)
+
+    @classmethod
+    async def bulk_delete_mutation_async(cls, ids: List[int]) -> List[bool]:
+        async with cls.async_session() as db:
+            return await cls.resolver_class.bulk_delete_async(db, ids)
@@ -1,5 +1,6 @@
 import strawberry
 
+from ..health_monitor import health_monitor
 from ..resolvers.health import HealthResolver
 from ..types.health import DatabaseStatus, HealthStatus, ServiceStatus
 
@@ -7,16 +8,21 @@ from ..types.health import DatabaseStatus, HealthStatus, ServiceStatus
 @strawberry.type
 class HealthQueries:
     @strawberry.field
-    def health(self) -> HealthStatus:
-        health_data = HealthResolver.get_health_status()
+    async def health(self) -> HealthStatus:
+        health_data = HealthResolver.get_health_status(await health_monitor.current())
 
         return HealthStatus(
             status=health_data["status"],
             timestamp=health_data["timestamp"],
+            stale=health_data["stale"],
             api=ServiceStatus(status=health_data["api"]["status"]),
             database=DatabaseStatus(
                 status=health_data["database"]["status"],
                 connection=health_data["database"]["connection"],
                 details=health_data["database"]["details"],
+                latency_ms=health_data["database"]["latency_ms"],
+                replication_lag_seconds=health_data["database"][
+                    "replication_lag_seconds"
+                ],
             ),
         )
@@ -1,9 +1,21 @@
-from typing import List, Optional
+from typing import AsyncGenerator, List, Optional
 
 import strawberry
+from strawberry.types import Info
 
+from ..query_cost import FieldCost
 from ..resolvers.note import NoteResolver
-from ..types.note import CreateNoteInput, Note, UpdateNoteInput
+from ..resolvers.pagination import DEFAULT_PAGE_SIZE
+from ..types.note import (
+    BulkUpdateNoteInput,
+    CreateNoteInput,
+    Note,
+    NoteFilter,
+    NoteOrderBy,
+    UpdateNoteInput,
+)
+from ..types.pagination import Connection, SearchConnection
+from ..types.sync import Changes
 from .base import BaseSchemaGenerator
 
 
@@ -16,25 +28,122 @@ class NoteSchemaGenerator(
 
 @strawberry.type
 class NoteQueries:
-    @strawberry.field
-    def notes(self) -> List[Note]:
-        return NoteSchemaGenerator.get_all_query()
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("first",))})
+    async def notes(
+        self,
+        info: Info,
+        first: int = DEFAULT_PAGE_SIZE,
+        filter: Optional[NoteFilter] = None,
+        order_by: Optional[List[NoteOrderBy]] = None,
+    ) -> List[Note]:
+        return await NoteSchemaGenerator.resolve(
+            "get_all_query",
+            limit=first,
+            fields=NoteSchemaGenerator.requested_fields(info),
+            filters=NoteSchemaGenerator.filters_from_input(filter),
+            order_by=NoteSchemaGenerator.order_from_input(order_by),
+        )
 
-    @strawberry.field
-    def note(self, id: int) -> Optional[Note]:
-        return NoteSchemaGenerator.get_by_id_query(id)
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("first", "last"))})
+    async def notes_connection(
+        self,
+        info: Info,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+    ) -> Connection[Note]:
+        return await NoteSchemaGenerator.resolve(
+            "get_page_query",
+            first=first,
+            after=after,
+            last=last,
+            before=before,
+            fields=NoteSchemaGenerator.requested_fields(info, "edges", "node"),
+        )
+
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("first",))})
+    async def search_notes(
+        self,
+        info: Info,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> SearchConnection[Note]:
+        return await NoteSchemaGenerator.resolve(
+            "search_query",
+            query=query,
+            first=first,
+            after=after,
+            fields=NoteSchemaGenerator.requested_fields(info, "edges", "node"),
+        )
+
+    @strawberry.field(
+        description="Notes written after `since`, and ids deleted since then",
+        metadata={"cost": FieldCost(size_args=("first",))},
+    )
+    async def notes_changed_since(
+        self,
+        info: Info,
+        since: Optional[str] = None,
+        first: Optional[int] = None,
+    ) -> Changes[Note]:
+        return await NoteSchemaGenerator.resolve(
+            "get_changes_query",
+            since=since,
+            first=first,
+            fields=NoteSchemaGenerator.requested_fields(info, "items"),
+        )
+
+    @strawberry.field(metadata={"cost": FieldCost(cost=1)})
+    async def note(self, info: Info, id: int) -> Optional[Note]:
+        return await NoteSchemaGenerator.load_by_id(info, id)
 
 
 @strawberry.type
 class NoteMutations:
     @strawberry.field
-    def create_note(self, input: CreateNoteInput) -> Note:
-        return NoteSchemaGenerator.create_mutation(input)
+    async def create_note(self, input: CreateNoteInput) -> Note:
+        return await NoteSchemaGenerator.resolve("create_mutation", input)
 
     @strawberry.field
-    def update_note(self, id: int, input: UpdateNoteInput) -> Optional[Note]:
-        return NoteSchemaGenerator.update_mutation(id, input)
+    async def update_note(self, id: int, input: UpdateNoteInput) -> Optional[Note]:
+        return await NoteSchemaGenerator.resolve("update_mutation", id, input)
 
     @strawberry.field
-    def delete_note(self, id: int) -> bool:
-        return NoteSchemaGenerator.delete_mutation(id)
+    async def delete_note(self, id: int) -> bool:
+        return await NoteSchemaGenerator.resolve("delete_mutation", id)
+
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("inputs",))})
+    async def create_notes(self, inputs: List[CreateNoteInput]) -> List[Note]:
+        return await NoteSchemaGenerator.resolve("bulk_create_mutation", inputs)
+
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("inputs",))})
+    async def update_notes(
+        self, inputs: List[BulkUpdateNoteInput]
+    ) -> List[Optional[Note]]:
+        return await NoteSchemaGenerator.resolve(
+            "bulk_update_mutation", [(item.id, item.input) for item in inputs]
+        )
+
+    @strawberry.field(metadata={"cost": FieldCost(size_args=("ids",))})
+    async def delete_notes(self, ids: List[int]) -> List[bool]:
+        return await NoteSchemaGenerator.resolve("bulk_delete_mutation", ids)
+
+
+@strawberry.type
+class NoteSubscriptions:
+    @strawberry.subscription
+    async def note_created(self) -> AsyncGenerator[Note, None]:
+        async for note in NoteSchemaGenerator.changes("created"):
+            yield note
+
+    @strawberry.subscription
+    async def note_updated(self) -> AsyncGenerator[Note, None]:
+        async for note in NoteSchemaGenerator.changes("updated"):
+            yield note
+
+    @strawberry.subscription(description="Ids of deleted notes")
+    async def note_deleted(self) -> AsyncGenerator[int, None]:
+        async for id in NoteSchemaGenerator.changes("deleted"):
+            yield id
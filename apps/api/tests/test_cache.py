@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from apps.api.cache import InMemoryGenerationBackend, QueryCache
+
+
+class TestQueryCache:
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits and misses"""
+        cache = QueryCache(max_bytes=10_000, ttl=60)
+        key = cache.list_key("note", "get_all_query", ())
+
+        assert cache.get(key) == (False, None)
+        cache.set(key, ["a", "b"])
+        assert cache.get(key) == (True, ["a", "b"])
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the byte budget evicts the oldest entries first"""
+        cache = QueryCache(max_bytes=350, ttl=60)
+        cache.set("a", "x" * 100)
+        cache.set("b", "y" * 100)
+        cache.get("a")
+        cache.set("c", "z" * 100)
+
+        assert cache.get("a")[0] is True
+        assert cache.get("b")[0] is False
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entries_miss(self):
+        """Test that entries older than the TTL are dropped"""
+        cache = QueryCache(max_bytes=10_000, ttl=5)
+        with patch("apps.api.cache.time.monotonic", return_value=100.0):
+            cache.set("a", "value")
+        with patch("apps.api.cache.time.monotonic", return_value=106.0):
+            assert cache.get("a") == (False, None)
+
+        assert cache.stats()["expirations"] == 1
+
+    def test_invalidate_is_scoped_to_ids_and_lists(self):
+        """Test that a write only invalidates its ids and the model's lists"""
+        cache = QueryCache(max_bytes=10_000, ttl=60)
+        list_key = cache.list_key("note", "get_all_query", ())
+        note_1 = cache.id_key("note", "get_by_id_query", 1, ())
+        note_2 = cache.id_key("note", "get_by_id_query", 2, ())
+        for key in (list_key, note_1, note_2):
+            cache.set(key, "cached")
+
+        cache.invalidate("note", [1])
+
+        assert cache.get(cache.list_key("note", "get_all_query", ()))[0] is False
+        assert cache.get(cache.id_key("note", "get_by_id_query", 1, ()))[0] is False
+        assert cache.get(cache.id_key("note", "get_by_id_query", 2, ()))[0] is True
+
+    def test_shared_backend_propagates_invalidation(self):
+        """Test that caches sharing a backend see each other's invalidations"""
+        backend = InMemoryGenerationBackend()
+        worker_a = QueryCache(max_bytes=10_000, ttl=60, backend=backend)
+        worker_b = QueryCache(max_bytes=10_000, ttl=60, backend=backend)
+        worker_b.set(worker_b.id_key("note", "get_by_id_query", 1, ()), "stale")
+
+        worker_a.invalidate("note", [1])
+
+        assert (
+            worker_b.get(worker_b.id_key("note", "get_by_id_query", 1, ()))[0] is False
+        )
@@ -14,11 +14,14 @@ class DatabaseStatus:
     status: str
     connection: bool
     details: Optional[str]
+    latency_ms: Optional[float]
+    replication_lag_seconds: Optional[float]
 
 
 @strawberry.type
 class HealthStatus:
     status: str
     timestamp: datetime
+    stale: bool
     api: ServiceStatus
     database: DatabaseStatus
@@ -1,8 +1,11 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 
 import strawberry
 
+from .pagination import SortDirection
+
 
 @strawberry.type
 class Note:
@@ -26,3 +29,33 @@ class UpdateNoteInput:
     title: Optional[str] = None
     content: Optional[str] = None
     is_published: Optional[bool] = None
+
+
+@strawberry.input
+class BulkUpdateNoteInput:
+    id: int
+    input: UpdateNoteInput
+
+
+@strawberry.input
+class NoteFilter:
+    is_published: Optional[bool] = None
+    created_at_gte: Optional[datetime] = None
+    created_at_lt: Optional[datetime] = None
+    updated_at_gte: Optional[datetime] = None
+    updated_at_lt: Optional[datetime] = None
+    title_prefix: Optional[str] = None
+
+
+@strawberry.enum
+class NoteSortField(Enum):
+    ID = "id"
+    TITLE = "title"
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+
+
+@strawberry.input
+class NoteOrderBy:
+    field: NoteSortField
+    direction: SortDirection = SortDirection.ASC
@@ -0,0 +1,48 @@
+from enum import Enum
+from typing import Generic, List, Optional, TypeVar
+
+import strawberry
+
+NodeType = TypeVar("NodeType")
+
+
+@strawberry.enum
+class SortDirection(Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    has_previous_page: bool
+    start_cursor: Optional[str]
+    end_cursor: Optional[str]
+
+
+@strawberry.type
+class Edge(Generic[NodeType]):
+    cursor: str
+    node: NodeType
+
+
+@strawberry.type
+class Connection(Generic[NodeType]):
+    edges: List[Edge[NodeType]]
+    page_info: PageInfo
+
+
+@strawberry.type
+class SearchEdge(Generic[NodeType]):
+    cursor: str
+    node: NodeType
+    rank: float
+    snippet: str = strawberry.field(
+        description="Matching excerpt with hits wrapped in <mark></mark>"
+    )
+
+
+@strawberry.type
+class SearchConnection(Generic[NodeType]):
+    edges: List[SearchEdge[NodeType]]
+    page_info: PageInfo
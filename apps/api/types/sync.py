@@ -0,0 +1,27 @@
+from typing import Generic, List, Optional, TypeVar
+
+import strawberry
+
+NodeType = TypeVar("NodeType")
+
+
+@strawberry.type
+class Changes(Generic[NodeType]):
+    items: List[NodeType] = strawberry.field(
+        description="Rows created or updated since the watermark"
+    )
+    deleted_ids: List[int] = strawberry.field(
+        description="Ids deleted since the watermark"
+    )
+    has_more: bool = strawberry.field(
+        description="More changes follow; call again with the new watermark"
+    )
+    watermark: Optional[str] = strawberry.field(
+        description="Pass as `since` on the next sync"
+    )
+    reset: bool = strawberry.field(
+        description=(
+            "`since` was older than the tombstone retention: replace the "
+            "local copy with these rows instead of applying them"
+        )
+    )
@@ -0,0 +1,238 @@
+"""One database session and transaction per GraphQL operation
+
+The context getter gives every request a `UnitOfWork`; it opens no
+session until the first resolver needs one. `UnitOfWorkExtension` makes
+it current while the operation executes, so every `BaseSchemaGenerator`
+call in the operation shares one session (and connection) instead of
+checking out its own, and ends it once afterwards.
+
+Writes still commit as they happen unless ATOMIC_MUTATIONS=1. Then the
+resolvers only flush, a mutation operation commits once after all of
+its fields ran, and any error rolls every field back. Cache
+invalidation, change events and read-after tokens wait for that commit.
+"""
+
+import asyncio
+import inspect
+import os
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+ATOMIC_MUTATIONS = os.getenv("ATOMIC_MUTATIONS", "").lower() in ("1", "true", "yes")
+# Session.info key that makes `BaseResolver` flush instead of commit
+DEFER_COMMIT = "defer_commit"
+
+
+class TransactionAborted(Exception):
+    """An earlier field's error rolled back this operation's transaction"""
+
+
+class UnitOfWork:
+    """The session shared by every resolver call in one operation
+
+    Resolvers may run concurrently (async fields, DataLoader batches), so
+    each use holds the session exclusively: queries in one operation run
+    one after another on its single connection and, in sync mode with
+    resolver threads, its single worker.
+    """
+
+    def __init__(self) -> None:
+        # Set per operation: only mutations defer their commit
+        self.atomic = False
+        self.writes = 0
+        self.failed = False
+        self._session: Optional[Any] = None
+        self._after_commit: List[Callable[[], Awaitable[None]]] = []
+        self._thread_lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        # The resolver executor slot held for the operation, in sync mode
+        self._worker: Optional[Any] = None
+        self._worker_lock: Optional[asyncio.Lock] = None
+        # Calls waiting for the worker, in order; see `run`
+        self._worker_queue: Optional[asyncio.Lock] = None
+        self._slot = AsyncExitStack()
+
+    @property
+    def uncommitted(self) -> bool:
+        """Whether this operation holds writes that are not committed yet"""
+        return self.atomic and self.writes > 0
+
+    def _open(self, open_session: Callable[[], Any]) -> Any:
+        if self.failed:
+            raise TransactionAborted("transaction rolled back by an earlier error")
+        if self._session is None:
+            self._session = open_session()
+            if self.atomic:
+                self._session.info[DEFER_COMMIT] = True
+        return self._session
+
+    def _failed(self, db: Any) -> None:
+        # A failed replica is marked unhealthy; let the retry choose again
+        db.info.pop("replica", None)
+        # Without atomic writes, later fields start over in a new transaction
+        if self.atomic:
+            self.failed = True
+
+    @contextmanager
+    def session(self, open_session: Callable[[], Any]) -> Iterator[Any]:
+        """The shared sync Session, opened with `open_session` on first use"""
+        with self._thread_lock:
+            db = self._open(open_session)
+            try:
+                yield db
+            except Exception:
+                db.rollback()
+                self._failed(db)
+                raise
+
+    @asynccontextmanager
+    async def async_session(
+        self, open_session: Callable[[], Any]
+    ) -> AsyncIterator[Any]:
+        """The shared AsyncSession, opened with `open_session` on first use"""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            db = self._open(open_session)
+            try:
+                yield db
+            except Exception:
+                await db.rollback()
+                self._failed(db)
+                raise
+
+    async def use_worker(self, executor: Any) -> None:
+        """Hold one of `executor`'s slots until the operation finishes
+
+        The operation's session keeps its connection between calls, so it
+        keeps its thread too: an operation never queues behind others
+        while holding a connection they may be waiting for.
+        """
+        if self._worker_lock is None:
+            self._worker_lock = asyncio.Lock()
+        async with self._worker_lock:
+            if self._worker is None:
+                await self._slot.enter_async_context(executor.slot())
+                self._worker = executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call blocking `func` on the operation's worker, one call at a time
+
+        Concurrent fields wait their turn here, on the event loop, instead
+        of each taking a pool thread only to block on the session: the
+        operation never uses more than the one thread its slot reserved.
+        Call `use_worker` first.
+        """
+        if self._worker_queue is None:
+            self._worker_queue = asyncio.Lock()
+        async with self._worker_queue:
+            return await self._worker.run(func, *args, **kwargs)
+
+    async def _call(self, method: Callable[[], Any]) -> Any:
+        # Blocking sync session calls go to the worker, not the event loop
+        if self._worker is not None:
+            return await self.run(method)
+        return await _maybe_await(method())
+
+    async def record_write(self, on_commit: Callable[[], Awaitable[None]]) -> None:
+        """Note a write; `on_commit` runs once it is committed
+
+        Outside atomic mutations the resolver already committed, so that is
+        right away.
+        """
+        self.writes += 1
+        if self._session is not None:
+            # Reads after a write must not stay on an earlier replica choice
+            self._session.info.pop("replica", None)
+        if self.atomic:
+            self._after_commit.append(on_commit)
+        else:
+            await on_commit()
+
+    async def finish(self, commit: bool) -> bool:
+        """End the transaction and close the session; True if writes committed"""
+        session, self._session = self._session, None
+        callbacks, self._after_commit = self._after_commit, []
+        committed = not self.uncommitted
+        try:
+            if session is not None:
+                try:
+                    if self.uncommitted and commit and not self.failed:
+                        await self._call(session.commit)
+                        committed = True
+                finally:
+                    # Rolls back whatever was not committed
+                    await self._call(session.close)
+        finally:
+            self._worker = None
+            await self._slot.aclose()
+        if committed:
+            for callback in callbacks:
+                await callback()
+        return committed
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar(
+    "current_unit_of_work", default=None
+)
+
+
+def pending_write() -> bool:
+    """Whether the running operation wrote and has not committed yet
+
+    Such reads bypass the query cache and replicas: only the operation's
+    own transaction can see those rows.
+    """
+    unit = current_unit_of_work.get()
+    return unit is not None and unit.uncommitted
+
+
+class UnitOfWorkExtension(SchemaExtension):
+    """Makes the context's unit of work current and ends it after execution
+
+    Subscriptions are left alone: they live as long as their connection
+    and must not hold a transaction open.
+    """
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        unit = getattr(self.execution_context.context, "unit_of_work", None)
+        operation_type = self.execution_context.operation_type
+        if unit is None or operation_type == OperationType.SUBSCRIPTION:
+            yield
+            return
+
+        unit.atomic = ATOMIC_MUTATIONS and operation_type == OperationType.MUTATION
+        token = current_unit_of_work.set(unit)
+        try:
+            yield
+        except BaseException:
+            # e.g. the client went away; still release the session and slot
+            await unit.finish(commit=False)
+            raise
+        finally:
+            current_unit_of_work.reset(token)
+
+        result = self.execution_context.result
+        errors = list(getattr(result, "errors", None) or [])
+        atomic_writes = unit.uncommitted
+        try:
+            committed = await unit.finish(commit=not errors)
+        except Exception as exc:
+            committed = False
+            errors.append(GraphQLError(f"Transaction failed to commit: {exc}"))
+        if atomic_writes and not committed and result is not None:
+            # None of the fields' writes happened; do not report them as done
+            result.data = None
+            result.errors = errors